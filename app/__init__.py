@@ -1,4 +1,5 @@
 ﻿from argon2 import PasswordHasher
+import click
 from datetime import datetime
 from xml.sax.saxutils import escape as xml_escape
 from flask import Flask, Response, flash, redirect, request, session, url_for
@@ -22,8 +23,10 @@ from app.students.routes import students_bp
 from app.utils.authz import is_super_admin_platform, normalized_role
 from app.utils.subscriptions import (
     get_or_create_portal_settings,
+    get_portal_settings,
     get_subscription_for_user,
     is_subscription_active_for_user,
+    price_for_plan,
     process_subscription_notifications,
     subscriptions_enforced,
 )
@@ -123,7 +126,7 @@ def create_app(config_class=Config):
     @app.context_processor
     def inject_globals():
         try:
-            settings = get_or_create_portal_settings()
+            settings = get_portal_settings()
         except (OperationalError, ProgrammingError):
             settings = None
         site_name = _clean_text_label((settings.site_name if settings and getattr(settings, "site_name", None) else "E-PROJECT"), "E-PROJECT")
@@ -316,10 +319,6 @@ def create_app(config_class=Config):
     def enforce_password_change():
         if not current_user.is_authenticated:
             return None
-        try:
-            process_subscription_notifications()
-        except Exception:
-            pass
 
         # Keep branch-scoped users aligned to their membership branch.
         role_now = normalized_role(getattr(current_user, "role", None))
@@ -541,7 +540,14 @@ def register_cli(app):
     @app.cli.command("process-subscriptions")
     def process_subscriptions_job():
         """Execution planifiee: expire abonnements + envoie notifications."""
-        process_subscription_notifications()
+        # Hors requete HTTP: PUBLIC_BASE_URL sert de base aux liens des emails.
+        base_url = (app.config.get("PUBLIC_BASE_URL") or "").strip()
+        if not base_url:
+            # Sans elle, les emails partiraient avec des liens http://localhost.
+            app.logger.error("PUBLIC_BASE_URL non defini: notifications d'abonnement non envoyees.")
+            raise click.ClickException("PUBLIC_BASE_URL requis pour process-subscriptions.")
+        with app.test_request_context(base_url=base_url):
+            process_subscription_notifications()
         print("Subscription notifications processed.")
 
     @app.cli.command("seed-entities")
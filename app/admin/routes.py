@@ -15,7 +15,13 @@ from app.utils.audit import add_audit_log
 from app.utils.authz import is_branch_admin, is_founder, is_super_admin_platform, normalized_role, role_required, user_branch_ids
 from app.utils.emailer import send_email_smtp
 from app.utils.files import save_uploaded_file
-from app.utils.subscriptions import get_or_create_portal_settings, is_billable_subscription, plan_required, send_subscription_transactional_email
+from app.utils.subscriptions import (
+    get_or_create_portal_settings,
+    invalidate_portal_settings_cache,
+    is_billable_subscription,
+    plan_required,
+    send_subscription_transactional_email,
+)
 
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
@@ -658,6 +664,7 @@ def it_settings():
         settings.plan_pro_price = _to_float(form.plan_pro_price.data, default=0.0)
         settings.plan_enterprise_price = _to_float(form.plan_enterprise_price.data, default=0.0)
         db.session.commit()
+        invalidate_portal_settings_cache()
         add_audit_log(current_user.id, "platform_settings_update", "Paramètres plateforme modifiés", branch_id=current_user.branch_id, action="platform_settings_update")
         flash("Paramètres plateforme enregistrés.", "success")
         return redirect(url_for("admin.it_settings"))
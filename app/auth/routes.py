@@ -16,8 +16,9 @@ from app.utils.authz import is_super_admin_platform, normalized_role
 from app.utils.emailer import send_email_smtp
 from app.utils.files import save_uploaded_file
 from app.utils.subscriptions import (
-    get_or_create_portal_settings,
+    get_portal_settings,
     get_subscription_for_user,
+    invalidate_subscription_cache,
     price_for_plan,
     subscriptions_enforced,
     user_has_active_subscription,
@@ -161,7 +162,7 @@ def login():
 @limiter.limit("3 per minute")
 def signup_agency():
     form = AgencySignupForm()
-    settings = get_or_create_portal_settings()
+    settings = get_portal_settings()
     if not form.validate_on_submit():
         for field, errs in form.errors.items():
             if errs:
@@ -244,7 +245,7 @@ def subscription_status():
     if current_user.role not in ("FOUNDER",) and not is_subscription_owner(current_user):
         return redirect(url_for("dashboard.index"))
 
-    settings = get_or_create_portal_settings()
+    settings = get_portal_settings()
     sub = get_subscription_for_user(current_user)
     if sub is None:
         if not current_user.branch_id:
@@ -293,6 +294,7 @@ def subscription_status():
             )
             db.session.add(sub)
             db.session.commit()
+            invalidate_subscription_cache()
 
     if not subscriptions_enforced(settings):
         if sub.status != "active":
@@ -387,7 +389,7 @@ def forgot_password():
         if user and user.is_active and smtp:
             token = _password_reset_serializer().dumps({"uid": user.id})
             reset_link = url_for("auth.reset_password", token=token, _external=True)
-            platform_name = (get_or_create_portal_settings().site_name or "E-PROJECT").strip()
+            platform_name = (get_portal_settings().site_name or "E-PROJECT").strip()
             subject = f"Réinitialisation du mot de passe - {platform_name}"
             body_text = (
                 "Bonjour,\n\n"
@@ -24,11 +24,24 @@ def _normalize_database_url(raw_url: str) -> str:
     return url
 
 
+def _engine_options(database_url: str) -> dict:
+    # SQLite keeps SQLAlchemy's default pool (pool_size is meaningless there).
+    if database_url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_pre_ping": True,
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-change-me")
     SQLALCHEMY_DATABASE_URI = _normalize_database_url(
         os.getenv("DATABASE_URL", f"sqlite:///{basedir / 'innovformation.db'}")
     )
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024
@@ -47,6 +60,8 @@ class Config:
     SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
     SMTP_FROM = os.getenv("SMTP_FROM", "eudyproject@gmail.com")
     SMTP_TLS = _as_bool("SMTP_TLS", True)
+    # Send subscription billing emails from a background worker instead of the request thread.
+    EMAIL_BACKGROUND_SEND = _as_bool("EMAIL_BACKGROUND_SEND", True)
 
     # Session/cookie hardening
     SESSION_COOKIE_HTTPONLY = True
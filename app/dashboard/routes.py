@@ -31,7 +31,7 @@ from app.models import (
 from app.utils.audit import add_audit_log
 from app.utils.authz import can_access_branch, is_super_admin_platform, normalized_role, role_required, scope_query_by_branch, user_branch_ids
 from app.utils.commissions import sync_commissions_for_cases
-from app.utils.subscriptions import get_or_create_portal_settings, get_plan_catalog, plan_required
+from app.utils.subscriptions import get_plan_catalog, get_portal_settings, plan_required
 
 
 dashboard_bp = Blueprint("dashboard", __name__)
@@ -750,25 +750,25 @@ def chat_send():
 
 @dashboard_bp.route("/a-propos")
 def public_about():
-    settings = get_or_create_portal_settings()
+    settings = get_portal_settings()
     return render_template("public/about.html", settings=settings)
 
 
 @dashboard_bp.route("/services")
 def public_services():
-    settings = get_or_create_portal_settings()
+    settings = get_portal_settings()
     return render_template("public/services.html", settings=settings)
 
 
 @dashboard_bp.route("/contact")
 def public_contact():
-    settings = get_or_create_portal_settings()
+    settings = get_portal_settings()
     return render_template("public/contact.html", settings=settings)
 
 @dashboard_bp.route("/", methods=["GET", "POST"])
 def index():
     if not current_user.is_authenticated:
-        settings = get_or_create_portal_settings()
+        settings = get_portal_settings()
         plans = get_plan_catalog(settings)
         plan_payment_links = {
             "starter": settings.payment_link_starter or settings.payment_link,
@@ -27,9 +27,9 @@ from app.models import (
 )
 from app.utils.audit import add_audit_log
 from app.utils.authz import is_super_admin_platform, normalized_role, role_required, scope_query_by_branch, user_branch_ids
-from app.utils.emailer import send_email_smtp
+from app.utils.emailer import SMTPSessionPool
 from app.utils.files import save_uploaded_file
-from app.utils.tokens import generate_token_value
+from app.utils.tokens import generate_token_value, generate_token_values
 from app.utils.subscriptions import plan_required
 
 
@@ -146,14 +146,14 @@ def _missing_rdv_event_branches(recipients):
     return missing
 
 
-def _build_rdv_link(item, branch_id):
+def _build_rdv_link(item, branch_id, token_value=None):
     event = _resolve_event_for_branch(branch_id)
     if not event:
         return ""
 
     student_id = item.get("student_id") or None
     try:
-        token_value = generate_token_value()
+        token_value = token_value or generate_token_value()
         invite = InviteToken(
             event_id=event.id,
             student_id=student_id,
@@ -667,77 +667,81 @@ def _send_to_recipients(
     inline_images = [{"cid": cid, "path": path} for cid, path in zip(logo_cids, custom_logo_paths or [])]
     sender_role = normalized_role(getattr(current_user, "role", None))
     sender_branch_id = _resolve_sender_branch_id() if sender_role in ("FOUNDER", "ADMIN_BRANCH", "EMPLOYEE") else None
+    # Invite tokens for the whole batch drawn in one go.
+    rdv_tokens = iter(generate_token_values(total)) if effective_cta else None
+
+    # One SMTP connection per sender configuration for the whole batch.
+    with SMTPSessionPool() as smtp_pool:
+        for item in recipients:
+            effective_branch_id = item.get("branch_id")
+            if effective_branch_id is None and sender_branch_id:
+                effective_branch_id = sender_branch_id
+
+            context = _base_email_context(item, overrides=context_overrides)
+            if effective_cta:
+                rdv_link = _build_rdv_link(item, effective_branch_id, token_value=next(rdv_tokens))
+                if rdv_link:
+                    context["lien_rdv"] = rdv_link
+            subject = Template(subject_tpl or "").render(**context)
+            raw_html = Template(body_html_tpl or "").render(**context)
+            body_text = Template(body_text_tpl or "").render(**context)
+
+            logo_url, logo_text, resolved_logo_urls = _resolve_logo(
+                logo_choice,
+                branch_id=item.get("branch_id"),
+                custom_logo_urls=[],
+                logo_display=logo_display,
+            )
+            cta_link = context.get("lien_rdv", "")
+            html_wrapped = _wrap_email_html(
+                raw_html,
+                logo_url,
+                logo_text,
+                cta_label=effective_cta,
+                cta_link=cta_link,
+                logo_urls=resolved_logo_urls,
+                logo_cids=logo_cids if logo_choice == "custom" else [],
+                footer_text=context.get("agency_name") or "",
+            )
 
-    for item in recipients:
-        effective_branch_id = item.get("branch_id")
-        if effective_branch_id is None and sender_branch_id:
-            effective_branch_id = sender_branch_id
-
-        context = _base_email_context(item, overrides=context_overrides)
-        if effective_cta:
-            rdv_link = _build_rdv_link(item, effective_branch_id)
-            if rdv_link:
-                context["lien_rdv"] = rdv_link
-        subject = Template(subject_tpl or "").render(**context)
-        raw_html = Template(body_html_tpl or "").render(**context)
-        body_text = Template(body_text_tpl or "").render(**context)
-
-        logo_url, logo_text, resolved_logo_urls = _resolve_logo(
-            logo_choice,
-            branch_id=item.get("branch_id"),
-            custom_logo_urls=[],
-            logo_display=logo_display,
-        )
-        cta_link = context.get("lien_rdv", "")
-        html_wrapped = _wrap_email_html(
-            raw_html,
-            logo_url,
-            logo_text,
-            cta_label=effective_cta,
-            cta_link=cta_link,
-            logo_urls=resolved_logo_urls,
-            logo_cids=logo_cids if logo_choice == "custom" else [],
-            footer_text=context.get("agency_name") or "",
-        )
-
-        dispatch = EmailDispatch(
-            branch_id=effective_branch_id,
-            template_id=template_id,
-            recipient_type=item["recipient_type"],
-            recipient_email=item["email"],
-            student_id=item.get("student_id"),
-            guardian_id=item.get("guardian_id"),
-            status="pending",
-        )
-        db.session.add(dispatch)
-        db.session.flush()
-
-        log = EmailLog(
-            branch_id=effective_branch_id,
-            to_email=item["email"],
-            subject=subject,
-            status="pending",
-            sent_by=current_user.id,
-        )
-        db.session.add(log)
+            dispatch = EmailDispatch(
+                branch_id=effective_branch_id,
+                template_id=template_id,
+                recipient_type=item["recipient_type"],
+                recipient_email=item["email"],
+                student_id=item.get("student_id"),
+                guardian_id=item.get("guardian_id"),
+                status="pending",
+            )
+            db.session.add(dispatch)
+            db.session.flush()
+
+            log = EmailLog(
+                branch_id=effective_branch_id,
+                to_email=item["email"],
+                subject=subject,
+                status="pending",
+                sent_by=current_user.id,
+            )
+            db.session.add(log)
 
-        try:
-            smtp = get_effective_smtp_settings(effective_branch_id)
-            if not smtp:
-                raise RuntimeError(
-                    f"SMTP agence introuvable (branch_id={effective_branch_id}). Configure SMTP dans cette agence avant envoi."
-                )
-            send_email_smtp(smtp, item["email"], subject, html_wrapped, body_text, inline_images=inline_images)
-            dispatch.status = "sent"
-            dispatch.sent_at = datetime.utcnow()
-            log.status = "sent"
-            sent_count += 1
-        except Exception as exc:
-            error_msg = str(exc)
-            dispatch.status = "failed"
-            dispatch.error_message = error_msg
-            log.status = "failed"
-            log.error = error_msg
+            try:
+                smtp = get_effective_smtp_settings(effective_branch_id)
+                if not smtp:
+                    raise RuntimeError(
+                        f"SMTP agence introuvable (branch_id={effective_branch_id}). Configure SMTP dans cette agence avant envoi."
+                    )
+                smtp_pool.send(smtp, item["email"], subject, html_wrapped, body_text, inline_images=inline_images)
+                dispatch.status = "sent"
+                dispatch.sent_at = datetime.utcnow()
+                log.status = "sent"
+                sent_count += 1
+            except Exception as exc:
+                error_msg = str(exc)
+                dispatch.status = "failed"
+                dispatch.error_message = error_msg
+                log.status = "failed"
+                log.error = error_msg
 
     db.session.commit()
     return sent_count, total, ""
@@ -1,7 +1,10 @@
 from datetime import datetime
 
 from flask_login import UserMixin
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, Select, UniqueConstraint, event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, with_loader_criteria
+from sqlalchemy.sql import Alias, Subquery
 
 from app.extensions import db, login_manager
 
@@ -578,6 +581,10 @@ class PortalSetting(db.Model):
 
 class AgencySubscription(db.Model):
     __tablename__ = "agency_subscriptions"
+    __table_args__ = (
+        Index("ix_agency_sub_status_ends", "status", "ends_at"),
+        Index("ix_agency_sub_owner_branch", "owner_user_id", "branch_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     branch_id = db.Column(db.Integer, db.ForeignKey("branches.id"), nullable=False, unique=True)
@@ -604,4 +611,46 @@ def load_user(user_id):
     return db.session.get(User, int(user_id))
 
 
-
+SOFT_DELETE_MODELS = tuple(
+    mapper.class_ for mapper in db.Model.registry.mappers if hasattr(mapper.class_, "deleted_at")
+)
+
+
+def _selected_model(statement):
+    descriptions = statement.column_descriptions
+    entity = descriptions[0].get("entity") if descriptions else None
+    if entity is None:
+        # Query.count() enveloppe la requete d'origine dans un sous-select.
+        froms = statement.get_final_froms()
+        inner = froms[0] if len(froms) == 1 else None
+        while isinstance(inner, (Alias, Subquery)):
+            inner = inner.element
+        return _selected_model(inner) if isinstance(inner, Select) else None
+    return sa_inspect(entity).mapper.class_
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_soft_deleted_rows(execute_state):
+    """Soft-delete guard for queries whose selected entity has ``deleted_at``.
+
+    Joins and relationship loads from other entities still see archived rows
+    (a case keeps its student). Opt out with
+    ``.execution_options(include_deleted=True)``.
+    """
+    if (
+        not execute_state.is_select
+        or execute_state.is_column_load
+        or execute_state.is_relationship_load
+        or execute_state.execution_options.get("include_deleted", False)
+    ):
+        return
+    model_cls = _selected_model(execute_state.statement)
+    if model_cls in SOFT_DELETE_MODELS:
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                model_cls,
+                lambda cls: cls.deleted_at.is_(None),
+                include_aliases=True,
+                propagate_to_loaders=False,
+            )
+        )
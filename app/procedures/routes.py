@@ -32,6 +32,14 @@ def _enforce_case_access(case_row):
         abort(403)
 
 
+def _case_student_or_404(case_row):
+    # Un dossier reste consultable meme si l'etudiant a ete archive (soft-delete).
+    student = db.session.get(Student, case_row.student_id, execution_options={"include_deleted": True})
+    if student is None:
+        abort(404)
+    return student
+
+
 def _sync_case_stages_with_status(case_row):
     stages = CaseStage.query.filter_by(case_id=case_row.id).all()
     if not stages:
@@ -552,7 +560,7 @@ def view_case(case_id):
     case_row = StudyCase.query.get_or_404(case_id)
     _enforce_case_access(case_row)
 
-    student = Student.query.get_or_404(case_row.student_id)
+    student = _case_student_or_404(case_row)
     stages = CaseStage.query.filter_by(case_id=case_row.id).order_by(CaseStage.created_at.asc()).all()
     documents = Document.query.filter_by(case_id=case_row.id).order_by(Document.created_at.desc()).all()
     payments = CasePayment.query.filter_by(case_id=case_row.id).order_by(CasePayment.created_at.desc()).all()
@@ -683,7 +691,7 @@ def update_case_payment(case_id, payment_id):
 def quick_mark_case_status(case_id, status):
     case_row = StudyCase.query.get_or_404(case_id)
     _enforce_case_access(case_row)
-    student = Student.query.get_or_404(case_row.student_id)
+    student = _case_student_or_404(case_row)
 
     allowed = {"parti", "arrive", "installe"}
     if status not in allowed:
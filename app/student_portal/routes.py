@@ -29,7 +29,11 @@ def get_current_student():
     auth = get_current_student_auth()
     if not auth:
         return None
-    return Student.query.get(auth.student_id)
+    student = Student.query.get(auth.student_id)
+    if student is None:
+        # Etudiant archive (soft-delete) : la session portail n'est plus valide.
+        session.pop(SESSION_KEY, None)
+    return student
 
 
 def student_photo_url(student):
@@ -50,8 +54,7 @@ def inject_student_portal_context():
 def student_login_required(view):
     @wraps(view)
     def wrapper(*args, **kwargs):
-        auth = get_current_student_auth()
-        if not auth:
+        if get_current_student() is None:
             return redirect(url_for("student_portal.login"))
         return view(*args, **kwargs)
 
@@ -60,7 +63,7 @@ def student_login_required(view):
 
 @student_portal_bp.route("/login", methods=["GET", "POST"])
 def login():
-    if get_current_student_auth():
+    if get_current_student():
         return redirect(url_for("student_portal.dashboard"))
 
     form = StudentLoginForm()
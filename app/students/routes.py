@@ -3,6 +3,7 @@ import io
 import os
 from collections import Counter
 from datetime import datetime
+from functools import lru_cache
 import html
 import tempfile
 import re
@@ -13,6 +14,7 @@ from flask_login import current_user, login_required
 from openpyxl import Workbook, load_workbook
 from openpyxl.worksheet.table import Table, TableStyleInfo
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from sqlalchemy import update
 
 from app.extensions import csrf, db
 from argon2 import PasswordHasher
@@ -73,10 +75,11 @@ def generate_matricule(reserved=None):
     reserved = reserved or set()
     year = datetime.utcnow().year
     # Unique key is global on students.matricule, including soft-deleted rows.
-    index = Student.query.count() + 1
+    all_students = Student.query.execution_options(include_deleted=True)
+    index = all_students.count() + 1
     while True:
         candidate = f"IF-{year}-{index:05d}"
-        if candidate not in reserved and not Student.query.filter(Student.matricule == candidate).first():
+        if candidate not in reserved and not all_students.filter(Student.matricule == candidate).first():
             return candidate
         index += 1
 
@@ -1215,6 +1218,75 @@ def export_students_csv():
     )
 
 
+IMPORT_INTERNAL_MATRICULE_RE = re.compile(r"IF-\d{4}-\d{5}")
+IMPORT_NIVEAU_RE = re.compile(r"(BTS\s*\d+|LICENCE\s*\d+|MASTER\s*\d+|DOCTORAT\s*\d+|MBA\s*\d+|DUT\s*\d+|BACHELOR\s*\d+)")
+IMPORT_KEY_ALIASES = {
+    "matricule": "matricule",
+    "client_id": "matricule",
+    "code_client": "matricule",
+    "nom": "nom",
+    "prenoms": "prenoms",
+    "prenom": "prenoms",
+    "sexe": "sexe",
+    "date_naissance": "date_naissance",
+    "datenaissance": "date_naissance",
+    "date_de_naissance": "date_naissance",
+    "email": "email",
+    "telephone": "telephone",
+    "tel": "telephone",
+    "contact_eleve": "telephone",
+    "contact_parent": "telephone",
+    "adresse": "adresse",
+    "filiere": "filiere",
+    "programmes_filieres": "filiere",
+    "programme_filiere": "filiere",
+    "niveau": "niveau",
+    "promotion": "promotion",
+    "annee": "promotion",
+    "annee_scolaire": "promotion",
+    "year": "promotion",
+    "last_name": "nom",
+    "firstname": "prenoms",
+    "first_name": "prenoms",
+    "surname": "nom",
+    "phone": "telephone",
+    "mobile": "telephone",
+    "mail": "email",
+    "e_mail": "email",
+    "class": "niveau",
+    "niveau_etude": "niveau",
+    "program": "filiere",
+    "programme": "filiere",
+    "statut": "statut",
+    "statut_global": "statut_global",
+}
+
+
+# Helpers purs appeles par ligne/cellule d'import: les entrees se repetent beaucoup (entetes, filieres).
+@lru_cache(maxsize=1024)
+def _norm_key(raw_key):
+    base = (raw_key or "").strip().lower()
+    base = unicodedata.normalize("NFKD", base)
+    base = "".join(ch for ch in base if not unicodedata.combining(ch))
+    base = re.sub(r"[^a-z0-9]+", "_", base).strip("_")
+    return IMPORT_KEY_ALIASES.get(base, "")
+
+
+@lru_cache(maxsize=256)
+def _guess_niveau(filiere_text):
+    txt = (filiere_text or "").strip().upper()
+    m = IMPORT_NIVEAU_RE.search(txt)
+    if m:
+        return m.group(1)
+    return ""
+
+
+@lru_cache(maxsize=4096)
+def _is_internal_matricule(value):
+    v = (value or "").strip().upper()
+    return bool(IMPORT_INTERNAL_MATRICULE_RE.fullmatch(v))
+
+
 @students_bp.route("/import", methods=["GET", "POST"])
 @csrf.exempt
 @login_required
@@ -1237,69 +1309,33 @@ def import_students_csv():
         updated = 0
         skipped = 0
         reserved_matricules = set()
+        created_by_email = {}
+        created_by_identity = {}
+        pending_updates = {}
+
+        def _current_value(student, key):
+            # L'UPDATE groupe n'est applique qu'en fin de fichier : la valeur en
+            # file d'attente prime sur celle lue en base.
+            queued = pending_updates.get(student.id, {}) if student.id is not None else {}
+            return queued[key] if key in queued else getattr(student, key)
+
+        def _first_current_match(query, imported, **expected):
+            """Plus ancien etudiant dont les valeurs, changements en attente compris, valent ``expected``."""
+            candidates = query.order_by(Student.id.asc()).all()
+            if imported is not None and imported not in candidates:
+                candidates.append(imported)
+            matches = [
+                student for student in candidates
+                if all(_current_value(student, key) == value for key, value in expected.items())
+            ]
+            # Students created by this file have no id yet: they come after existing rows.
+            matches.sort(key=lambda student: (student.id is None, student.id or 0))
+            return matches[0] if matches else None
+
         target_branch_id = resolve_actor_branch_id()
         if not target_branch_id:
             flash("Branche introuvable pour cet import. Connecte-toi avec un compte agence ou choisis un scope IT.", "danger")
             return redirect(url_for("students.import_students_csv"))
-        key_aliases = {
-            "matricule": "matricule",
-            "client_id": "matricule",
-            "code_client": "matricule",
-            "nom": "nom",
-            "prenoms": "prenoms",
-            "prenom": "prenoms",
-            "sexe": "sexe",
-            "date_naissance": "date_naissance",
-            "datenaissance": "date_naissance",
-            "date_de_naissance": "date_naissance",
-            "email": "email",
-            "telephone": "telephone",
-            "tel": "telephone",
-            "contact_eleve": "telephone",
-            "contact_parent": "telephone",
-            "adresse": "adresse",
-            "filiere": "filiere",
-            "programmes_filieres": "filiere",
-            "programme_filiere": "filiere",
-            "niveau": "niveau",
-            "promotion": "promotion",
-            "annee": "promotion",
-            "annee_scolaire": "promotion",
-            "year": "promotion",
-            "last_name": "nom",
-            "firstname": "prenoms",
-            "first_name": "prenoms",
-            "surname": "nom",
-            "phone": "telephone",
-            "mobile": "telephone",
-            "mail": "email",
-            "e_mail": "email",
-            "class": "niveau",
-            "niveau_etude": "niveau",
-            "program": "filiere",
-            "programme": "filiere",
-            "statut": "statut",
-            "statut_global": "statut_global",
-        }
-
-        def _norm_key(raw_key):
-            base = (raw_key or "").strip().lower()
-            base = unicodedata.normalize("NFKD", base)
-            base = "".join(ch for ch in base if not unicodedata.combining(ch))
-            base = re.sub(r"[^a-z0-9]+", "_", base).strip("_")
-            return key_aliases.get(base, "")
-
-        def _guess_niveau(filiere_text):
-            txt = (filiere_text or "").strip().upper()
-            m = re.search(r"(BTS\s*\d+|LICENCE\s*\d+|MASTER\s*\d+|DOCTORAT\s*\d+|MBA\s*\d+|DUT\s*\d+|BACHELOR\s*\d+)", txt)
-            if m:
-                return m.group(1)
-            return ""
-
-        def _is_internal_matricule(value):
-            v = (value or "").strip().upper()
-            return bool(re.fullmatch(r"IF-\d{4}-\d{5}", v))
-
         row_source = []
         if filename.endswith(".xls"):
             flash("Format .xls non supporte. Convertis d'abord en .xlsx puis reimporte.", "danger")
@@ -1459,120 +1495,160 @@ def import_students_csv():
                     row_source.append(row)
 
         try:
-            for row in row_source:
-                normalized = {k: (row.get(k) or "").strip() for k in (
-                    "matricule", "nom", "prenoms", "sexe", "date_naissance", "email",
-                    "telephone", "adresse", "filiere", "niveau", "promotion", "statut", "statut_global"
-                )}
-
-                # Ignore fully empty lines from CSV files.
-                if not any(normalized.values()):
-                    skipped += 1
-                    continue
-
-                raw_matricule = normalized["matricule"]
-                matricule = raw_matricule.upper() if _is_internal_matricule(raw_matricule) else ""
-                if matricule and matricule in reserved_matricules:
-                    skipped += 1
-                    continue
+            # No autoflush while matching rows: lookups must not flush pending students/updates.
+            with db.session.no_autoflush:
+                for row in row_source:
+                    normalized = {k: (row.get(k) or "").strip() for k in (
+                        "matricule", "nom", "prenoms", "sexe", "date_naissance", "email",
+                        "telephone", "adresse", "filiere", "niveau", "promotion", "statut", "statut_global"
+                    )}
+
+                    # Ignore fully empty lines from CSV files.
+                    if not any(normalized.values()):
+                        skipped += 1
+                        continue
 
-                date_naissance = None
-                if normalized["date_naissance"]:
-                    try:
-                        date_naissance = datetime.fromisoformat(normalized["date_naissance"]).date()
-                    except ValueError:
+                    raw_matricule = normalized["matricule"]
+                    matricule = raw_matricule.upper() if _is_internal_matricule(raw_matricule) else ""
+                    if matricule and matricule in reserved_matricules:
                         skipped += 1
                         continue
 
-                nom_val = normalized["nom"]
-                prenoms_val = normalized["prenoms"]
-                filiere_val = normalized["filiere"]
-                niveau_val = normalized["niveau"] or _guess_niveau(normalized["filiere"])
-                promotion_val = normalized["promotion"]
-                sexe_val = normalized["sexe"] or "M"
-                statut_val = normalized["statut"] or "actif"
-                statut_global_val = normalized["statut_global"] or "prospect"
-                email_val = normalized["email"].lower() if normalized["email"] else None
-                telephone_val = normalized["telephone"] or None
-                adresse_val = normalized["adresse"] or None
-
-                existing = Student.query.filter(Student.matricule == matricule).first() if matricule else None
-                if existing is None and email_val:
-                    existing = Student.query.filter(Student.email == email_val, Student.deleted_at.is_(None)).order_by(Student.id.asc()).first()
-                if existing is None and nom_val and prenoms_val and promotion_val:
+                    date_naissance = None
+                    if normalized["date_naissance"]:
+                        try:
+                            date_naissance = datetime.fromisoformat(normalized["date_naissance"]).date()
+                        except ValueError:
+                            skipped += 1
+                            continue
+
+                    nom_val = normalized["nom"]
+                    prenoms_val = normalized["prenoms"]
+                    filiere_val = normalized["filiere"]
+                    niveau_val = normalized["niveau"] or _guess_niveau(normalized["filiere"])
+                    promotion_val = normalized["promotion"]
+                    sexe_val = normalized["sexe"] or "M"
+                    statut_val = normalized["statut"] or "actif"
+                    statut_global_val = normalized["statut_global"] or "prospect"
+                    email_val = normalized["email"].lower() if normalized["email"] else None
+                    telephone_val = normalized["telephone"] or None
+                    adresse_val = normalized["adresse"] or None
+
                     existing = (
-                        Student.query.filter(
-                            Student.nom == nom_val,
-                            Student.prenoms == prenoms_val,
-                            Student.promotion == promotion_val,
-                            Student.deleted_at.is_(None),
-                        )
-                        .order_by(Student.id.asc())
-                        .first()
+                        Student.query.execution_options(include_deleted=True).filter(Student.matricule == matricule).first()
+                        if matricule
+                        else None
                     )
+                    identity_key = (nom_val, prenoms_val, promotion_val)
+                    if existing is None and email_val:
+                        existing = _first_current_match(
+                            Student.query.filter(Student.email == email_val, Student.deleted_at.is_(None)),
+                            created_by_email.get(email_val),
+                            email=email_val,
+                        )
+                    if existing is None and nom_val and prenoms_val and promotion_val:
+                        existing = _first_current_match(
+                            Student.query.filter(
+                                Student.nom == nom_val,
+                                Student.prenoms == prenoms_val,
+                                Student.promotion == promotion_val,
+                                Student.deleted_at.is_(None),
+                            ),
+                            created_by_identity.get(identity_key),
+                            nom=nom_val,
+                            prenoms=prenoms_val,
+                            promotion=promotion_val,
+                        )
 
-                if existing:
-                    existing.branch_id = target_branch_id
-                    if nom_val:
-                        existing.nom = nom_val
-                    if prenoms_val:
-                        existing.prenoms = prenoms_val
-                    if sexe_val:
-                        existing.sexe = sexe_val
-                    existing.date_naissance = date_naissance
-                    existing.email = email_val
-                    existing.telephone = telephone_val
-                    existing.adresse = adresse_val
-                    if filiere_val:
-                        existing.filiere = filiere_val
-                    if niveau_val:
-                        existing.niveau = niveau_val
-                    if promotion_val:
-                        existing.promotion = promotion_val
-                    if statut_val:
-                        existing.statut = statut_val
-                    if statut_global_val:
-                        existing.statut_global = statut_global_val
-                    existing.deleted_at = None
-                    updated += 1
-                else:
-                    # For a new student, required fields must be provided.
-                    if not (nom_val and prenoms_val and filiere_val and niveau_val and promotion_val):
-                        skipped += 1
-                        continue
-
-                    if not matricule:
-                        matricule = generate_matricule(reserved=reserved_matricules)
+                    if existing:
+                        values = {
+                            "branch_id": target_branch_id,
+                            "date_naissance": date_naissance,
+                            "email": email_val,
+                            "telephone": telephone_val,
+                            "adresse": adresse_val,
+                            "deleted_at": None,
+                        }
+                        for key, value in (
+                            ("nom", nom_val),
+                            ("prenoms", prenoms_val),
+                            ("sexe", sexe_val),
+                            ("filiere", filiere_val),
+                            ("niveau", niveau_val),
+                            ("promotion", promotion_val),
+                            ("statut", statut_val),
+                            ("statut_global", statut_global_val),
+                        ):
+                            if value:
+                                values[key] = value
+                        if existing.id is None:
+                            # Student created earlier in this same file, not flushed yet.
+                            for key, value in values.items():
+                                setattr(existing, key, value)
+                        else:
+                            pending_updates.setdefault(existing.id, {"id": existing.id}).update(values)
+                        # Les lignes suivantes doivent retrouver l'etudiant sous ses nouvelles valeurs.
+                        if email_val:
+                            created_by_email[email_val] = existing
+                        new_identity = tuple(_current_value(existing, key) for key in ("nom", "prenoms", "promotion"))
+                        if all(new_identity):
+                            created_by_identity[new_identity] = existing
+                        updated += 1
+                    else:
+                        # For a new student, required fields must be provided.
+                        if not (nom_val and prenoms_val and filiere_val and niveau_val and promotion_val):
+                            skipped += 1
+                            continue
+
+                        if not matricule:
+                            matricule = generate_matricule(reserved=reserved_matricules)
+                            reserved_matricules.add(matricule)
+
+                        student = Student(
+                            branch_id=target_branch_id,
+                            matricule=matricule,
+                            nom=nom_val,
+                            prenoms=prenoms_val,
+                            sexe=sexe_val,
+                            date_naissance=date_naissance,
+                            email=email_val,
+                            telephone=telephone_val,
+                            adresse=adresse_val,
+                            filiere=filiere_val,
+                            niveau=niveau_val,
+                            promotion=promotion_val,
+                            statut=statut_val,
+                            statut_global=statut_global_val,
+                        )
+                        db.session.add(student)
+                        if email_val:
+                            created_by_email[email_val] = student
+                        if nom_val and prenoms_val and promotion_val:
+                            created_by_identity[identity_key] = student
+                        created += 1
+
+                    if matricule:
                         reserved_matricules.add(matricule)
 
-                    student = Student(
-                        branch_id=target_branch_id,
-                        matricule=matricule,
-                        nom=nom_val,
-                        prenoms=prenoms_val,
-                        sexe=sexe_val,
-                        date_naissance=date_naissance,
-                        email=email_val,
-                        telephone=telephone_val,
-                        adresse=adresse_val,
-                        filiere=filiere_val,
-                        niveau=niveau_val,
-                        promotion=promotion_val,
-                        statut=statut_val,
-                        statut_global=statut_global_val,
+                if pending_updates:
+                    db.session.execute(
+                        update(Student).execution_options(synchronize_session=False),
+                        list(pending_updates.values()),
                     )
-                    db.session.add(student)
-                    created += 1
-
-                if matricule:
-                    reserved_matricules.add(matricule)
         except csv.Error as exc:
             db.session.rollback()
             flash(f"CSV invalide: {exc}", "danger")
             return redirect(url_for("students.import_students_csv"))
 
+        add_audit_log(
+            current_user.id,
+            "student_import",
+            f"Import fichier: {created} crees, {updated} mis a jour, {skipped} ignores",
+            branch_id=current_user.branch_id,
+            action="student_import",
+            commit=False,
+        )
         db.session.commit()
-        add_audit_log(current_user.id, "student_import", f"Import fichier: {created} crees, {updated} mis a jour, {skipped} ignores", branch_id=current_user.branch_id, action="student_import")
         flash(f"Import termine. Crees: {created}, mis a jour: {updated}, ignores: {skipped}", "success")
         return redirect(url_for("students.list_students"))
 
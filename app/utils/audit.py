@@ -2,7 +2,7 @@
 from app.models import AuditLog
 
 
-def add_audit_log(user_id, type_event, details=None, student_id=None, branch_id=None, action=None):
+def add_audit_log(user_id, type_event, details=None, student_id=None, branch_id=None, action=None, commit=True):
     row = AuditLog(
         user_id=user_id,
         type_event=type_event,
@@ -12,4 +12,6 @@ def add_audit_log(user_id, type_event, details=None, student_id=None, branch_id=
         action=action,
     )
     db.session.add(row)
-    db.session.commit()
+    # commit=False lets callers log several events and commit once with their own changes.
+    if commit:
+        db.session.commit()
@@ -1,8 +1,10 @@
 ﻿from functools import wraps
 
-from flask import abort, session
+from flask import abort, g, has_app_context, session
 from flask_login import current_user
+from sqlalchemy import select, union
 
+from app.extensions import db
 from app.models import AgencySubscription, Membership
 
 
@@ -43,52 +45,57 @@ def is_branch_admin(user=None):
     return normalized_role(getattr(user, "role", None)) == "ADMIN_BRANCH"
 
 
-def _enterprise_branch_ids_for_user(user):
-    """Return all branch IDs belonging to the same owner enterprise as user.branch_id."""
-    branch_id = getattr(user, "branch_id", None)
-    if not branch_id:
-        return set()
-
-    owner_sub = AgencySubscription.query.filter_by(branch_id=branch_id).first()
-    if not owner_sub or not owner_sub.owner_user_id:
-        return set()
-
-    ids = {
-        row.branch_id
-        for row in AgencySubscription.query.with_entities(AgencySubscription.branch_id)
-        .filter(AgencySubscription.owner_user_id == owner_sub.owner_user_id)
-        .all()
-        if row.branch_id is not None
-    }
-
-    # Fallback: owner memberships can include enterprise branches not yet mirrored in subscriptions.
-    owner_memberships = Membership.query.filter_by(user_id=owner_sub.owner_user_id).all()
-    ids |= {m.branch_id for m in owner_memberships if m.branch_id is not None}
-    return ids
+def _enterprise_branch_ids_selects(branch_id):
+    """SELECTs of all branch IDs belonging to the same owner enterprise as branch_id."""
+    owner_user_id = (
+        select(AgencySubscription.owner_user_id)
+        .where(AgencySubscription.branch_id == branch_id)
+        .scalar_subquery()
+    )
+    return [
+        select(AgencySubscription.branch_id).where(AgencySubscription.owner_user_id == owner_user_id),
+        # Fallback: owner memberships can include enterprise branches not yet mirrored in subscriptions.
+        select(Membership.branch_id).where(Membership.user_id == owner_user_id),
+    ]
 
 
 def _user_branch_ids(user=None):
     user = user or current_user
     if not getattr(user, "is_authenticated", False):
-        return set()
+        return frozenset()
 
-    rows = Membership.query.filter_by(user_id=user.id).all()
-    ids = {r.branch_id for r in rows if r.branch_id is not None}
-
-    # Compat transition: keep legacy branch link while memberships are backfilled.
-    if getattr(user, "branch_id", None):
-        ids.add(user.branch_id)
+    selects = [select(Membership.branch_id).where(Membership.user_id == user.id)]
 
     # Business rule: branch staff can see enterprise-wide data.
+    legacy_branch_id = getattr(user, "branch_id", None)
     role = normalized_role(getattr(user, "role", None))
-    if role in ("ADMIN_BRANCH", "EMPLOYEE"):
-        ids |= _enterprise_branch_ids_for_user(user)
+    if legacy_branch_id and role in ("ADMIN_BRANCH", "EMPLOYEE"):
+        selects.extend(_enterprise_branch_ids_selects(legacy_branch_id))
+
+    stmt = union(*selects) if len(selects) > 1 else selects[0]
+    ids = {branch_id for branch_id in db.session.execute(stmt).scalars() if branch_id is not None}
 
+    # Compat transition: keep legacy branch link while memberships are backfilled.
+    if legacy_branch_id:
+        ids.add(legacy_branch_id)
+
+    return frozenset(ids)
+
+
+def _cached_user_branch_ids(user=None):
+    """Request-scoped (flask.g) cache of _user_branch_ids, keyed by user id."""
+    user = user or current_user
+    if not has_app_context() or not getattr(user, "is_authenticated", False):
+        return _user_branch_ids(user)
+    cache = g.setdefault("_user_branch_ids_cache", {})
+    ids = cache.get(user.id)
+    if ids is None:
+        ids = cache[user.id] = _user_branch_ids(user)
     return ids
 
 
 def user_branch_ids(user=None):
-    return sorted(_user_branch_ids(user))
+    return sorted(_cached_user_branch_ids(user))
 
 
 def can_access_branch(branch_id, user=None):
@@ -97,19 +104,13 @@ def can_access_branch(branch_id, user=None):
         return False
     if branch_id is None:
         return False
-    if is_super_admin_platform(user):
-        return True
-    return branch_id in _user_branch_ids(user)
+    return is_super_admin_platform(user) or branch_id in _cached_user_branch_ids(user)
 
 
 def scope_query_by_branch(query, model_cls):
     if not getattr(current_user, "is_authenticated", False):
         return query
 
-    # Global soft-delete guard when the model supports deleted_at.
-    if hasattr(model_cls, "deleted_at"):
-        query = query.filter(model_cls.deleted_at.is_(None))
-
     if not hasattr(model_cls, "branch_id"):
         return query
 
@@ -119,10 +120,13 @@ def scope_query_by_branch(query, model_cls):
             return query.filter(model_cls.branch_id == scoped_branch_id)
         return query
 
-    allowed_branch_ids = user_branch_ids()
+    # Branch ids come from one UNION query per request (memberships, enterprise
+    # branches, legacy branch_id), so a JOIN on memberships here would both
+    # re-query per call and drop the non-membership rules.
+    allowed_branch_ids = _cached_user_branch_ids()
     if not allowed_branch_ids:
         return query.filter(False)
-    return query.filter(model_cls.branch_id.in_(allowed_branch_ids))
+    return query.filter(model_cls.branch_id.in_(tuple(allowed_branch_ids)))
 
 
 def role_required(*roles):
@@ -35,6 +35,17 @@ def _pick_matching_rule(case_row):
     return generic
 
 
+def _apply_rule(case_row, rule, record):
+    if record is None:
+        return CommissionRecord(case_id=case_row.id, amount=rule.amount_per_student, status="pending"), True
+
+    if record.status == "pending" and float(record.amount or 0) != float(rule.amount_per_student or 0):
+        record.amount = rule.amount_per_student
+        return None, True
+
+    return None, False
+
+
 def sync_commission_for_case(case_row):
     """
     Cree/met a jour le record commission pour un dossier si une regle correspond.
@@ -48,20 +59,62 @@ def sync_commission_for_case(case_row):
         return False
 
     record = CommissionRecord.query.filter_by(case_id=case_row.id).order_by(CommissionRecord.id.desc()).first()
-    if record is None:
-        db.session.add(CommissionRecord(case_id=case_row.id, amount=rule.amount_per_student, status="pending"))
-        return True
+    new_record, changed = _apply_rule(case_row, rule, record)
+    if new_record is not None:
+        db.session.add(new_record)
+    return changed
 
-    if record.status == "pending" and float(record.amount or 0) != float(rule.amount_per_student or 0):
-        record.amount = rule.amount_per_student
-        return True
 
-    return False
+def sync_commissions_for_cases(cases):
+    """Version groupee de sync_commission_for_case: une requete pour les regles, une pour les records."""
+    candidates = [c for c in cases or [] if c is not None and c.entity_id and (c.status or "").strip()]
+    if not candidates:
+        return False
 
+    entity_ids = {c.entity_id for c in candidates}
+    statuses = {(c.status or "").strip() for c in candidates}
+    rules = (
+        CommissionRule.query.filter(
+            CommissionRule.entity_id.in_(entity_ids),
+            CommissionRule.trigger_status.in_(statuses),
+        )
+        .order_by(CommissionRule.created_at.desc())
+        .all()
+    )
+    # Tri decroissant: la premiere regle vue par cle est la plus recente.
+    rules_by_key = {}
+    for rule in rules:
+        rules_by_key.setdefault((rule.entity_id, rule.school_id, rule.trigger_status), rule)
+
+    matched = []
+    for case_row in candidates:
+        status = (case_row.status or "").strip()
+        rule = rules_by_key.get((case_row.entity_id, case_row.school_id, status)) or rules_by_key.get(
+            (case_row.entity_id, None, status)
+        )
+        if rule:
+            matched.append((case_row, rule))
+    if not matched:
+        return False
+
+    case_ids = {case_row.id for case_row, _ in matched}
+    records_by_case = {}
+    for record in (
+        CommissionRecord.query.filter(CommissionRecord.case_id.in_(case_ids))
+        .order_by(CommissionRecord.id.desc())
+        .all()
+    ):
+        records_by_case.setdefault(record.case_id, record)
 
-def sync_commissions_for_cases(cases):
     changed = False
-    for case_row in cases or []:
-        if sync_commission_for_case(case_row):
-            changed = True
+    new_records = []
+    for case_row, rule in matched:
+        new_record, row_changed = _apply_rule(case_row, rule, records_by_case.get(case_row.id))
+        if new_record is not None:
+            new_records.append(new_record)
+            records_by_case[case_row.id] = new_record
+        changed = changed or row_changed
+
+    if new_records:
+        db.session.add_all(new_records)
     return changed
@@ -1,9 +1,11 @@
 import mimetypes
 import smtplib
+from contextlib import contextmanager
 from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import parseaddr
+from functools import lru_cache
 
 
 def _resolve_from_email(smtp_settings):
@@ -25,12 +27,31 @@ def _resolve_from_email(smtp_settings):
     return configured_addr or configured
 
 
-def send_email_smtp(smtp_settings, to_email, subject, body_html, body_text=None, inline_images=None):
+@lru_cache(maxsize=128)
+def _image_subtype(path):
+    guessed, _ = mimetypes.guess_type(path)
+    if guessed and "/" in guessed:
+        return guessed.split("/", 1)[1]
+    return "png"
+
+
+def _as_recipient_list(to_email):
+    if isinstance(to_email, str):
+        return [to_email]
+    return [addr for addr in to_email or [] if addr]
+
+
+def build_email_message(smtp_settings, to_email, subject, body_html, body_text=None, inline_images=None):
+    """Build the MIME message before any SMTP connection is opened.
+
+    Returns (message, effective_from, recipients).
+    """
+    recipients = _as_recipient_list(to_email)
     msg = MIMEMultipart("related")
     msg["Subject"] = subject
     effective_from = _resolve_from_email(smtp_settings)
     msg["From"] = effective_from
-    msg["To"] = to_email
+    msg["To"] = ", ".join(recipients)
 
     alternative = MIMEMultipart("alternative")
     msg.attach(alternative)
@@ -47,22 +68,98 @@ def send_email_smtp(smtp_settings, to_email, subject, body_html, body_text=None,
         try:
             with open(path, "rb") as f:
                 data = f.read()
-            guessed, _ = mimetypes.guess_type(path)
-            subtype = "png"
-            if guessed and "/" in guessed:
-                subtype = guessed.split("/", 1)[1]
-            mime_img = MIMEImage(data, _subtype=subtype)
+            mime_img = MIMEImage(data, _subtype=_image_subtype(path))
             mime_img.add_header("Content-ID", f"<{cid}>")
             mime_img.add_header("Content-Disposition", "inline")
             msg.attach(mime_img)
         except Exception:
             continue
 
+    return msg, effective_from, recipients
+
+
+@contextmanager
+def smtp_session(smtp_settings):
+    """Open one authenticated SMTP connection to send several messages through."""
     server = smtplib.SMTP(smtp_settings.host, smtp_settings.port, timeout=15)
     try:
         if smtp_settings.use_tls:
             server.starttls()
         server.login(smtp_settings.username, smtp_settings.password)
-        server.sendmail(effective_from, [to_email], msg.as_string())
+        yield server
     finally:
-        server.quit()
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+
+def _is_connection_error(exc):
+    """True when the SMTP session itself is unusable, not just this message or recipient."""
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code == 421:
+        return True
+    # smtplib.SMTPException derives from OSError: only raw socket errors are left here.
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+class SMTPSessionPool:
+    """One open SMTP connection per SMTP configuration, shared by several sends.
+
+    Use it as a context manager: the connections still open are closed on exit.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for key in list(self._sessions):
+            self._discard(key)
+
+    def _discard(self, key):
+        entry = self._sessions.pop(key, None)
+        if entry is not None:
+            entry[0].__exit__(None, None, None)
+
+    def _server(self, smtp_settings, key):
+        entry = self._sessions.get(key)
+        if entry is None:
+            session = smtp_session(smtp_settings)
+            entry = self._sessions[key] = (session, session.__enter__())
+        return entry[1]
+
+    def send(self, smtp_settings, to_email, subject, body_html, body_text=None, inline_images=None):
+        msg, effective_from, recipients = build_email_message(
+            smtp_settings, to_email, subject, body_html, body_text, inline_images
+        )
+        payload = msg.as_bytes()
+        key = getattr(smtp_settings, "id", None) or id(smtp_settings)
+        for attempt in range(2):
+            reused = key in self._sessions
+            server = self._server(smtp_settings, key)
+            try:
+                server.sendmail(effective_from, recipients, payload)
+                return
+            except Exception as exc:
+                # A refused recipient or message leaves the session usable.
+                if not _is_connection_error(exc):
+                    raise
+                self._discard(key)
+                # Idle sessions get dropped by the server: retry once on a fresh one.
+                if attempt or not reused:
+                    raise
+
+
+def send_email_smtp(smtp_settings, to_email, subject, body_html, body_text=None, inline_images=None):
+    msg, effective_from, recipients = build_email_message(
+        smtp_settings, to_email, subject, body_html, body_text, inline_images
+    )
+    with smtp_session(smtp_settings) as server:
+        server.sendmail(effective_from, recipients, msg.as_bytes())
@@ -1,4 +1,5 @@
 ﻿import os
+from pathlib import Path
 from uuid import uuid4
 
 from werkzeug.utils import secure_filename
@@ -11,16 +12,36 @@ def is_allowed_file(filename, allowed_extensions):
     return ext in allowed_extensions
 
 
+# Bytes needed to validate each signature; other extensions are not sniffed.
+_SIGNATURE_HEAD_SIZE = {
+    "pdf": 5,
+    "jpg": 3,
+    "jpeg": 3,
+    "png": 8,
+    "webp": 12,
+}
+
+
 def _has_expected_signature(file_storage, ext):
     ext = (ext or "").lower()
+    size = _SIGNATURE_HEAD_SIZE.get(ext)
+    if size is None:
+        # Keep compatibility for doc/docx and other currently allowed types.
+        return True
+
     # Keep current pointer to avoid side effects for Flask file handlers.
     stream = file_storage.stream
     pos = stream.tell()
-    try:
-        stream.seek(0)
-        head = stream.read(64)
-    finally:
-        stream.seek(pos)
+    if pos == 0 and hasattr(stream, "peek"):
+        # Buffered streams expose the header without moving the pointer.
+        head = stream.peek(size)[:size]
+    else:
+        try:
+            stream.seek(0)
+            # read1 avoids refilling a whole buffer for a few header bytes.
+            head = stream.read1(size) if hasattr(stream, "read1") else stream.read(size)
+        finally:
+            stream.seek(pos)
 
     # Binary signature checks only for types we rely on most.
     if ext == "pdf":
@@ -31,8 +52,6 @@ def _has_expected_signature(file_storage, ext):
         return head.startswith(b"\x89PNG\r\n\x1a\n")
     if ext == "webp":
         return len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP"
-
-    # Keep compatibility for doc/docx and other currently allowed types.
     return True
 
 
@@ -54,10 +73,10 @@ def save_uploaded_file(file_storage, upload_dir, allowed_extensions):
     filename = f"{uuid4().hex}.{ext}"
     os.makedirs(upload_dir, exist_ok=True)
 
-    upload_dir_abs = os.path.abspath(upload_dir)
-    path = os.path.abspath(os.path.join(upload_dir_abs, filename))
-    if not path.startswith(upload_dir_abs + os.sep):
+    upload_dir_path = Path(upload_dir).resolve()
+    path = (upload_dir_path / filename).resolve()
+    if not path.is_relative_to(upload_dir_path):
         raise ValueError("Chemin de destination invalide.")
 
-    file_storage.save(path)
+    file_storage.save(str(path))
     return filename
@@ -1,14 +1,29 @@
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import make_dataclass
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import lru_cache, wraps
 from types import SimpleNamespace
 
-from flask import abort, current_app, flash, redirect, url_for
+from flask import abort, current_app, flash, g, has_app_context, redirect, url_for
 from flask_login import current_user
+from sqlalchemy import and_, case, or_, select, update
 
 from app.extensions import db
 from app.models import AgencySubscription, EmailLog, PortalSetting, SMTPSetting, User
 from app.utils.authz import is_super_admin_platform, normalized_role
-from app.utils.emailer import send_email_smtp
+from app.utils.emailer import SMTPSessionPool, send_email_smtp
+
+
+SUBSCRIPTION_EMAIL_MAX_ATTEMPTS = 3
+SUBSCRIPTION_SWEEP_BATCH_SIZE = 500
+_email_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="subscription-email")
+
+PORTAL_SETTINGS_CACHE_TTL = 60.0
+_PORTAL_SETTING_KEYS = tuple(PortalSetting.__table__.columns.keys())
+PortalSettingsSnapshot = make_dataclass("PortalSettingsSnapshot", _PORTAL_SETTING_KEYS, frozen=True)
+_settings_cache = {"app": None, "value": None, "enforced": None, "expires": 0.0}
 
 
 def get_or_create_portal_settings():
@@ -30,107 +45,143 @@ def get_or_create_portal_settings():
     return settings
 
 
-def get_plan_catalog(settings):
-    currency = (settings.plan_currency or "XOF").upper()
-    return [
+def get_portal_settings():
+    """Read-only PortalSetting snapshot cached in-process for PORTAL_SETTINGS_CACHE_TTL seconds.
+
+    Use get_or_create_portal_settings() when the row has to be modified, then
+    call invalidate_portal_settings_cache().
+    """
+    app = current_app._get_current_object()
+    now = time.monotonic()
+    if _settings_cache["app"] is app and _settings_cache["value"] is not None and now < _settings_cache["expires"]:
+        return _settings_cache["value"]
+
+    row = get_or_create_portal_settings()
+    snapshot = PortalSettingsSnapshot(**{key: getattr(row, key) for key in _PORTAL_SETTING_KEYS})
+    _settings_cache.update(
+        app=app,
+        value=snapshot,
+        enforced=_prices_enforced(snapshot),
+        expires=now + PORTAL_SETTINGS_CACHE_TTL,
+    )
+    return snapshot
+
+
+def invalidate_portal_settings_cache():
+    _settings_cache.update(app=None, value=None, enforced=None, expires=0.0)
+
+
+@lru_cache(maxsize=32)
+def _plan_catalog_rows(currency, starter_price, pro_price, enterprise_price):
+    return (
         {
             "code": "starter",
             "name": "Starter",
-            "price": float(settings.plan_starter_price or 0.0),
+            "price": starter_price,
             "currency": currency,
-            "features": [
+            "features": (
                 "CRM étudiants + documents",
                 "Dashboard branche",
                 "Emails basiques",
-            ],
+            ),
         },
         {
             "code": "pro",
             "name": "Pro",
-            "price": float(settings.plan_pro_price or 0.0),
+            "price": pro_price,
             "currency": currency,
-            "features": [
+            "features": (
                 "RDV avances + tokens",
                 "Emails personnalises + logos",
                 "Suivi procedures et commissions",
-            ],
+            ),
         },
         {
             "code": "enterprise",
             "name": "Enterprise",
-            "price": float(settings.plan_enterprise_price or 0.0),
+            "price": enterprise_price,
             "currency": currency,
-            "features": [
+            "features": (
                 "Multi-pays complet",
                 "Rapports globaux",
                 "Support prioritaire",
-            ],
+            ),
         },
-    ]
+    )
+
+
+def get_plan_catalog(settings):
+    # Rows are memoized on the price values: treat them as read-only.
+    return list(
+        _plan_catalog_rows(
+            (settings.plan_currency or "XOF").upper(),
+            float(settings.plan_starter_price or 0.0),
+            float(settings.plan_pro_price or 0.0),
+            float(settings.plan_enterprise_price or 0.0),
+        )
+    )
+
+
+_PLAN_ATTR = {
+    "starter": "plan_starter_price",
+    "pro": "plan_pro_price",
+    "enterprise": "plan_enterprise_price",
+}
 
 
 def price_for_plan(settings, plan_code):
-    plans = {p["code"]: p for p in get_plan_catalog(settings)}
-    row = plans.get(plan_code or "")
-    if not row:
-        return 0.0, (settings.plan_currency or "XOF").upper()
-    return float(row["price"] or 0.0), row["currency"]
+    currency = (settings.plan_currency or "XOF").upper()
+    attr = _PLAN_ATTR.get((plan_code or "").lower())
+    if not attr:
+        return 0.0, currency
+    return float(getattr(settings, attr) or 0.0), currency
 
 
-def subscriptions_enforced(settings=None):
-    settings = settings or get_or_create_portal_settings()
-    prices = [
-        float(settings.plan_starter_price or 0.0),
-        float(settings.plan_pro_price or 0.0),
-        float(settings.plan_enterprise_price or 0.0),
-    ]
-    return any(price > 0 for price in prices)
-
-
-def _resolve_smtp_for_subscription_notice(subscription):
-    branch_smtp = SMTPSetting.query.filter_by(branch_id=subscription.branch_id).first()
-    if branch_smtp:
-        return branch_smtp
-    global_smtp = SMTPSetting.query.filter_by(branch_id=None).first()
-    if global_smtp:
-        return global_smtp
-    return None
+def _prices_enforced(settings):
+    return (
+        float(settings.plan_starter_price or 0.0) > 0
+        or float(settings.plan_pro_price or 0.0) > 0
+        or float(settings.plan_enterprise_price or 0.0) > 0
+    )
 
 
-def _send_subscription_notice(subscription, subject, html_body, text_body):
-    smtp = _resolve_smtp_for_subscription_notice(subscription)
+def subscriptions_enforced(settings=None):
+    if settings is not None:
+        return _prices_enforced(settings)
+    snapshot = get_portal_settings()
+    # Computed once per cached settings snapshot.
+    enforced = _settings_cache["enforced"]
+    if enforced is None or _settings_cache["value"] is not snapshot:
+        enforced = _prices_enforced(snapshot)
+    return enforced
+
+
+def _send_subscription_notice(subscription, owner, smtp, subject, html_body, text_body, smtp_pool=None):
+    """Send one notice and return its unsaved EmailLog (None when it cannot be sent).
+
+    With smtp_pool, the SMTP connection is opened once per smtp.id and
+    reused for the following notices of the run.
+    """
     if not smtp:
-        return False, "SMTP indisponible"
-    owner = User.query.get(subscription.owner_user_id)
+        return None
     if not owner or not owner.email:
-        return False, "Owner email manquant"
+        return None
+    log = EmailLog(
+        branch_id=subscription.branch_id,
+        to_email=owner.email,
+        subject=subject,
+        status="sent",
+        sent_by=None,
+    )
     try:
-        send_email_smtp(smtp, owner.email, subject, html_body, text_body)
-        db.session.add(
-            EmailLog(
-                branch_id=subscription.branch_id,
-                to_email=owner.email,
-                subject=subject,
-                status="sent",
-                sent_by=None,
-            )
-        )
-        db.session.commit()
-        return True, None
+        if smtp_pool is not None:
+            smtp_pool.send(smtp, owner.email, subject, html_body, text_body)
+        else:
+            send_email_smtp(smtp, owner.email, subject, html_body, text_body)
     except Exception as exc:
-        db.session.add(
-            EmailLog(
-                branch_id=subscription.branch_id,
-                to_email=owner.email,
-                subject=subject,
-                status="failed",
-                error=str(exc),
-                sent_by=None,
-            )
-        )
-        db.session.commit()
-        return False, str(exc)
-
+        log.status = "failed"
+        log.error = str(exc)
+    return log
 
 
 def _resolve_platform_smtp():
@@ -152,7 +203,55 @@ def _resolve_platform_smtp():
     return None
 
 
+def _deliver_subscription_email(app, smtp_id, to_email, subject, html_body, text_body, branch_id, sent_by):
+    """Send one subscription email and write its EmailLog, in its own app context/session."""
+    with app.app_context():
+        smtp = db.session.get(SMTPSetting, smtp_id) if smtp_id else _resolve_platform_smtp()
+        error = None
+        if smtp is None:
+            error = "SMTP plateforme indisponible"
+        else:
+            for attempt in range(SUBSCRIPTION_EMAIL_MAX_ATTEMPTS):
+                try:
+                    send_email_smtp(smtp, to_email, subject, html_body, text_body)
+                    error = None
+                    break
+                except (smtplib.SMTPException, OSError) as exc:
+                    error = str(exc)
+                    if attempt + 1 < SUBSCRIPTION_EMAIL_MAX_ATTEMPTS:
+                        time.sleep(2 ** attempt)
+                except Exception as exc:
+                    error = str(exc)
+                    break
+
+        db.session.add(
+            EmailLog(
+                branch_id=branch_id,
+                to_email=to_email,
+                subject=subject,
+                status="failed" if error else "sent",
+                error=error,
+                sent_by=sent_by,
+            )
+        )
+        try:
+            db.session.commit()
+        except Exception:
+            # Worker threads reuse pooled connections: never leave one mid-transaction.
+            db.session.rollback()
+            current_app.logger.exception("EmailLog abonnement non enregistre pour %s", to_email)
+        finally:
+            db.session.close()
+        return error is None, error
+
+
 def send_subscription_transactional_email(subscription, subject, html_body, text_body, sent_by=None):
+    """Queue a platform billing email for the subscription owner.
+
+    SMTP delivery and the EmailLog write run on a background worker so the
+    request does not wait on the SMTP handshake; (True, None) means queued.
+    Delivery stays inline in testing or when EMAIL_BACKGROUND_SEND is off.
+    """
     if subscription is None:
         return False, "Subscription indisponible"
 
@@ -164,88 +263,163 @@ def send_subscription_transactional_email(subscription, subject, html_body, text
     if not smtp:
         return False, "SMTP plateforme indisponible"
 
-    try:
-        send_email_smtp(smtp, owner.email, subject, html_body, text_body)
-        db.session.add(
-            EmailLog(
-                branch_id=subscription.branch_id,
-                to_email=owner.email,
-                subject=subject,
-                status="sent",
-                sent_by=sent_by,
-            )
-        )
-        db.session.commit()
-        return True, None
-    except Exception as exc:
-        db.session.add(
-            EmailLog(
-                branch_id=subscription.branch_id,
-                to_email=owner.email,
-                subject=subject,
-                status="failed",
-                error=str(exc),
-                sent_by=sent_by,
-            )
-        )
-        db.session.commit()
-        return False, str(exc)
+    app = current_app._get_current_object()
+    args = (
+        app,
+        getattr(smtp, "id", None),
+        owner.email,
+        subject,
+        html_body,
+        text_body,
+        subscription.branch_id,
+        sent_by,
+    )
+    if app.testing or not app.config.get("EMAIL_BACKGROUND_SEND", True):
+        return _deliver_subscription_email(*args)
+    _email_executor.submit(_deliver_subscription_email, *args)
+    return True, None
+
+
+WARN_SUBJECT = "Votre abonnement va expirer"
+WARN_HTML_TMPL = (
+    "<p>Bonjour,</p>"
+    "<p>Votre abonnement arrive à expiration le <strong>{end_date}</strong>.</p>"
+    "<p>Renouvelez votre plan ici : <a href='{url}'>Gérer mon abonnement</a></p>"
+)
+WARN_TEXT_TMPL = (
+    "Bonjour,\n\n"
+    "Votre abonnement expire le {end_date}.\n"
+    "Gérer l'abonnement : {url}"
+)
+EXPIRED_SUBJECT = "Compte expiré - réabonnement requis"
+EXPIRED_HTML_TMPL = (
+    "<p>Bonjour,</p>"
+    "<p>Votre abonnement est expiré.</p>"
+    "<p>Pour réactiver votre compte : <a href='{url}'>Renouveler maintenant</a></p>"
+)
+EXPIRED_TEXT_TMPL = (
+    "Bonjour,\n\n"
+    "Votre abonnement est expiré.\n"
+    "Renouveler: {url}"
+)
+
 
 def process_subscription_notifications():
-    settings = get_or_create_portal_settings()
+    settings = get_portal_settings()
     notice_days = int(settings.expiry_notice_days or 7)
     now = datetime.utcnow()
-    subscriptions = AgencySubscription.query.filter(AgencySubscription.status.in_(["active", "expired"])).all()
-    dirty = False
-
-    for sub in subscriptions:
-        if not sub.ends_at:
-            continue
-        days_left = (sub.ends_at.date() - now.date()).days
-
-        if sub.status == "active" and days_left <= notice_days:
-            already_sent_recently = sub.last_warning_sent_at and (now - sub.last_warning_sent_at) < timedelta(hours=23)
-            if not already_sent_recently:
-                manage_url = url_for("auth.subscription_status", _external=True)
-                subject = "Votre abonnement va expirer"
-                html_body = (
-                    "<p>Bonjour,</p>"
-                    f"<p>Votre abonnement arrive à expiration le <strong>{sub.ends_at.strftime('%d/%m/%Y')}</strong>.</p>"
-                    f"<p>Renouvelez votre plan ici : <a href='{manage_url}'>Gérer mon abonnement</a></p>"
-                )
-                text_body = (
-                    "Bonjour,\n\n"
-                    f"Votre abonnement expire le {sub.ends_at.strftime('%d/%m/%Y')}.\n"
-                    f"Gérer l'abonnement : {manage_url}"
-                )
-                _send_subscription_notice(sub, subject, html_body, text_body)
-                sub.last_warning_sent_at = now
-                dirty = True
-
-        if sub.ends_at < now:
-            if sub.status != "expired":
-                sub.status = "expired"
-                dirty = True
-            already_sent_recently = sub.last_expired_sent_at and (now - sub.last_expired_sent_at) < timedelta(hours=23)
-            if not already_sent_recently:
+    # A notice sent after this instant is too recent to be sent again.
+    recent_threshold = now - timedelta(hours=23)
+    # Only rows due a warning (ends within notice_days, by calendar day) or
+    # already past ends_at; SKIP LOCKED lets overlapping runs share the work.
+    warn_before = datetime.combine(now.date() + timedelta(days=notice_days + 1), datetime.min.time())
+    stmt = (
+        select(AgencySubscription)
+        .where(
+            AgencySubscription.status.in_(["active", "expired"]),
+            AgencySubscription.ends_at.isnot(None),
+            or_(
+                and_(AgencySubscription.status == "active", AgencySubscription.ends_at < warn_before),
+                AgencySubscription.ends_at < now,
+            ),
+        )
+        .with_for_update(skip_locked=True)
+        .execution_options(yield_per=SUBSCRIPTION_SWEEP_BATCH_SIZE)
+    )
+    expired_ids = []
+    warned_ids = []
+    expired_notice_ids = []
+    has_logs = False
+    manage_url = None
+    smtps = {}
+    smtp_branch_ids = set()
+
+    # One SMTP connection per config for the whole run.
+    with SMTPSessionPool() as smtp_pool:
+        # Rows are streamed in batches so memory stays bounded whatever the
+        # number of subscriptions.
+        for batch in db.session.scalars(stmt).partitions():
+            if manage_url is None:
                 manage_url = url_for("auth.subscription_status", _external=True)
-                subject = "Compte expiré - réabonnement requis"
-                html_body = (
-                    "<p>Bonjour,</p>"
-                    "<p>Votre abonnement est expiré.</p>"
-                    f"<p>Pour réactiver votre compte : <a href='{manage_url}'>Renouveler maintenant</a></p>"
-                )
-                text_body = (
-                    "Bonjour,\n\n"
-                    "Votre abonnement est expiré.\n"
-                    f"Renouveler: {manage_url}"
-                )
-                _send_subscription_notice(sub, subject, html_body, text_body)
-                sub.last_expired_sent_at = now
-                dirty = True
-
-    if dirty:
-        db.session.commit()
+                expired_html = EXPIRED_HTML_TMPL.format(url=manage_url)
+                expired_text = EXPIRED_TEXT_TMPL.format(url=manage_url)
+
+            # Preload owners and SMTP configs per batch instead of 2 queries per subscription.
+            owner_ids = {sub.owner_user_id for sub in batch}
+            owners = {u.id: u for u in User.query.filter(User.id.in_(owner_ids)).all()}
+            new_branch_ids = {sub.branch_id for sub in batch} - smtp_branch_ids
+            if new_branch_ids:
+                for row in (
+                    SMTPSetting.query.filter(
+                        or_(SMTPSetting.branch_id.in_(new_branch_ids), SMTPSetting.branch_id.is_(None))
+                    )
+                    .order_by(SMTPSetting.id.asc())
+                    .all()
+                ):
+                    smtps.setdefault(row.branch_id, row)
+                smtp_branch_ids |= new_branch_ids
+
+            pending_logs = []
+            for sub in batch:
+                owner = owners.get(sub.owner_user_id)
+                smtp = smtps.get(sub.branch_id) or smtps.get(None)
+                days_left = (sub.ends_at.date() - now.date()).days
+
+                if sub.status == "active" and days_left <= notice_days:
+                    already_sent_recently = sub.last_warning_sent_at and sub.last_warning_sent_at > recent_threshold
+                    if not already_sent_recently:
+                        end_date = sub.ends_at.strftime("%d/%m/%Y")
+                        html_body = WARN_HTML_TMPL.format(end_date=end_date, url=manage_url)
+                        text_body = WARN_TEXT_TMPL.format(end_date=end_date, url=manage_url)
+                        log = _send_subscription_notice(
+                            sub, owner, smtp, WARN_SUBJECT, html_body, text_body, smtp_pool
+                        )
+                        if log is not None:
+                            pending_logs.append(log)
+                        warned_ids.append(sub.id)
+
+                if sub.ends_at < now:
+                    if sub.status != "expired":
+                        expired_ids.append(sub.id)
+                    already_sent_recently = sub.last_expired_sent_at and sub.last_expired_sent_at > recent_threshold
+                    if not already_sent_recently:
+                        log = _send_subscription_notice(
+                            sub, owner, smtp, EXPIRED_SUBJECT, expired_html, expired_text, smtp_pool
+                        )
+                        if log is not None:
+                            pending_logs.append(log)
+                        expired_notice_ids.append(sub.id)
+
+            # Write the batch's logs out, then let its rows go: the commit
+            # below still covers every batch in one transaction.
+            if pending_logs:
+                db.session.add_all(pending_logs)
+                db.session.flush()
+                has_logs = True
+            for sub in batch:
+                db.session.expunge(sub)
+
+    # One UPDATE ... WHERE id IN (...) per transition instead of one per row.
+    transitions = (
+        (expired_ids, {"status": "expired"}),
+        (warned_ids, {"last_warning_sent_at": now}),
+        (expired_notice_ids, {"last_expired_sent_at": now}),
+    )
+    for ids, values in transitions:
+        if ids:
+            db.session.execute(
+                update(AgencySubscription)
+                .where(AgencySubscription.id.in_(ids))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+
+    if has_logs or expired_ids or warned_ids or expired_notice_ids:
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
 
 
 def current_user_subscription():
@@ -280,42 +454,120 @@ def owner_billable_subscription(owner_user_id):
     )
 
 
+def _subscription_cache_key(user):
+    return (getattr(user, "id", None), getattr(user, "role", None), getattr(user, "branch_id", None))
+
+
 def get_subscription_for_user(user):
+    """Request-scoped (flask.g) memo of _get_subscription_for_user.
+
+    The key includes role and branch_id so a user re-attached to another
+    branch during the request gets a fresh lookup.
+    """
     if not user:
         return None
+    user_id = getattr(user, "id", None)
+    if not has_app_context() or user_id is None:
+        return _get_subscription_for_user(user)
+    cache = g.setdefault("_subscription_cache", {})
+    key = _subscription_cache_key(user)
+    if key not in cache:
+        cache[key] = _get_subscription_for_user(user)
+    return cache[key]
+
+
+def invalidate_subscription_cache():
+    if has_app_context():
+        g.pop("_subscription_cache", None)
+
+
+def _billable_first_order():
+    # Billable row first (sub.branch_id == owner.branch_id), then oldest id:
+    # same ranking as owner_billable_subscription + is_billable_subscription.
+    return (
+        case((AgencySubscription.branch_id == User.branch_id, 0), else_=1),
+        AgencySubscription.id.asc(),
+    )
+
+
+def _get_subscription_for_user(user, columns=None):
+    """Resolve the user's subscription: the ORM row, or a Row of ``columns``."""
+    entities = columns or (AgencySubscription,)
+
+    def first(stmt):
+        row = db.session.execute(stmt.limit(1)).first()
+        if row is None or columns:
+            return row
+        return row[0]
+
     role = normalized_role(getattr(user, "role", None))
     if role == "FOUNDER":
-        by_owner = owner_billable_subscription(user.id)
-        if by_owner:
-            return by_owner
-        fallback = AgencySubscription.query.filter_by(owner_user_id=user.id).order_by(AgencySubscription.id.asc()).first()
-        if fallback:
-            return fallback
+        owned = first(
+            select(*entities)
+            .select_from(AgencySubscription)
+            .join(User, AgencySubscription.owner_user_id == User.id)
+            .where(AgencySubscription.owner_user_id == user.id)
+            .order_by(*_billable_first_order())
+        )
+        if owned:
+            return owned
 
     branch_id = getattr(user, "branch_id", None)
     if not branch_id:
         return None
 
-    branch_sub = AgencySubscription.query.filter_by(branch_id=branch_id).first()
-    if branch_sub and not is_billable_subscription(branch_sub):
-        owner_sub = owner_billable_subscription(branch_sub.owner_user_id)
-        if owner_sub:
-            return owner_sub
-    return branch_sub
+    # The branch subscription, or its owner's billable one when the branch row
+    # is not billable; the outer join keeps the branch row if its owner is gone.
+    branch_owner_id = (
+        select(AgencySubscription.owner_user_id)
+        .where(AgencySubscription.branch_id == branch_id)
+        .scalar_subquery()
+    )
+    return first(
+        select(*entities)
+        .select_from(AgencySubscription)
+        .outerjoin(User, AgencySubscription.owner_user_id == User.id)
+        .where(AgencySubscription.owner_user_id == branch_owner_id)
+        .where(
+            or_(
+                AgencySubscription.branch_id == branch_id,
+                AgencySubscription.branch_id == User.branch_id,
+            )
+        )
+        .order_by(*_billable_first_order())
+    )
+
+
+def _fetch_sub_status_tuple(user):
+    """(status, ends_at) of the user's subscription, or None.
+
+    Reuses the row memoized by get_subscription_for_user when this request
+    already loaded it; otherwise only the two columns are selected.
+    """
+    if not user:
+        return None
+    cache = g.get("_subscription_cache", {}) if has_app_context() else {}
+    key = _subscription_cache_key(user)
+    if key in cache:
+        sub = cache[key]
+        return (sub.status, sub.ends_at) if sub else None
+    row = _get_subscription_for_user(user, columns=(AgencySubscription.status, AgencySubscription.ends_at))
+    return tuple(row) if row else None
 
 
 def user_has_active_subscription(user):
-    sub = get_subscription_for_user(user)
+    row = _fetch_sub_status_tuple(user)
+    status, ends_at = row if row else (None, None)
     # Un abonnement explicitement expire doit toujours bloquer, meme en mode gratuit.
-    if sub and sub.status == "expired":
+    if status == "expired":
         return False
     if not subscriptions_enforced():
         return True
-    if not sub:
+    if not row:
         return False
-    if sub.status != "active":
+    if status != "active":
         return False
-    if sub.ends_at and sub.ends_at < datetime.utcnow():
+    if ends_at and ends_at < datetime.utcnow():
         return False
     return True
 
@@ -344,6 +596,8 @@ def current_user_plan_code(user=None):
     if is_super_admin_platform(user):
         return "enterprise"
 
+    # plan_code is read from the memoized subscription row, so an upgrade
+    # made earlier in the same request is still reflected.
     sub = get_subscription_for_user(user)
     if not sub:
         return "starter"
@@ -358,19 +612,23 @@ def user_plan_allows(min_plan="starter", user=None):
         return True
 
     required = PLAN_RANKS.get(_normalize_plan_code(min_plan), 1)
+    # Every plan includes starter: no subscription lookup needed.
+    if required == 1:
+        return True
     current = PLAN_RANKS.get(current_user_plan_code(user), 1)
     return current >= required
 
 
 def plan_required(min_plan="starter", feature_label=""):
     required_plan = _normalize_plan_code(min_plan)
+    starter_only = PLAN_RANKS[required_plan] == 1
 
     def decorator(view_func):
         @wraps(view_func)
         def wrapped(*args, **kwargs):
             if not current_user.is_authenticated:
                 abort(401)
-            if user_plan_allows(required_plan, current_user):
+            if starter_only or user_plan_allows(required_plan, current_user):
                 return view_func(*args, **kwargs)
 
             plan_name = required_plan.upper()
@@ -1,9 +1,22 @@
-﻿from datetime import datetime, timedelta
+﻿import os
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta
 from secrets import token_urlsafe
 
+TOKEN_NBYTES = 32
+
 
 def generate_token_value():
-    return token_urlsafe(32)
+    return token_urlsafe(TOKEN_NBYTES)
+
+
+def generate_token_values(n):
+    """n tokens in the generate_token_value format, from a single os.urandom call."""
+    buf = os.urandom(TOKEN_NBYTES * n)
+    return [
+        urlsafe_b64encode(buf[i : i + TOKEN_NBYTES]).rstrip(b"=").decode("ascii")
+        for i in range(0, TOKEN_NBYTES * n, TOKEN_NBYTES)
+    ]
 
 
 def default_expiry(days=7):
@@ -0,0 +1,15 @@
+import os
+
+from werkzeug.middleware.profiler import ProfilerMiddleware
+
+from app import create_app
+
+# Profil cProfile par requete (ex: /health, /auth/login), un fichier .prof par appel.
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+
+app = create_app()
+os.makedirs(PROFILE_DIR, exist_ok=True)
+app.wsgi_app = ProfilerMiddleware(app.wsgi_app, restrictions=[20], profile_dir=PROFILE_DIR)
+
+if __name__ == "__main__":
+    app.run(debug=False)
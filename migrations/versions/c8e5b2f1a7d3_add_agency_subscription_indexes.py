@@ -0,0 +1,26 @@
+"""add agency subscription indexes
+
+Revision ID: c8e5b2f1a7d3
+Revises: b1f4a0d9c2aa, bd12ef34a901
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c8e5b2f1a7d3"
+down_revision = ("b1f4a0d9c2aa", "bd12ef34a901")
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_agency_sub_status_ends", "agency_subscriptions", ["status", "ends_at"], unique=False)
+    op.create_index("ix_agency_sub_owner_branch", "agency_subscriptions", ["owner_user_id", "branch_id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_agency_sub_owner_branch", table_name="agency_subscriptions")
+    op.drop_index("ix_agency_sub_status_ends", table_name="agency_subscriptions")
@@ -2,8 +2,12 @@
 
 from app import create_app
 
-app = create_app()
+
+def build():
+    return create_app()
+
 
 if __name__ == "__main__":
     debug_mode = os.getenv("FLASK_DEBUG", "0").strip().lower() in {"1", "true", "yes", "on"}
+    app = build()
     app.run(debug=debug_mode)
@@ -0,0 +1,227 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import count
+from types import SimpleNamespace
+
+import pytest
+from argon2 import PasswordHasher
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+
+from app import create_app
+from app.extensions import db
+from app.models import AgencySubscription, Branch, Membership, Student, User
+
+
+# One in-memory DB name per pytest-xdist worker ("gw0", "gw1", ...).
+_WORKER_ID = os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+class TestConfig:
+    SECRET_KEY = "test"
+    # Named shared-cache memory DB on a single pooled connection: every
+    # session of the test run sees the same schema without reconnecting.
+    SQLALCHEMY_DATABASE_URI = f"sqlite:///file:testdb_{_WORKER_ID}?mode=memory&cache=shared&uri=true"
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "poolclass": StaticPool,
+        "connect_args": {"uri": True, "check_same_thread": False},
+        "echo": False,
+    }
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    RATELIMIT_ENABLED = False
+
+
+@event.listens_for(Engine, "connect")
+def _fast_sqlite(dbapi_connection, _connection_record):
+    # Throwaway test DB: no durability needed.
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+# Modules holding their own argon2 `password_hasher` instance.
+_PASSWORD_HASHER_MODULES = (
+    "app",
+    "app.admin.routes",
+    "app.auth.routes",
+    "app.student_portal.routes",
+    "app.students.routes",
+)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _cheap_password_hashing():
+    """Swap the argon2 hashers for the minimum-cost parameters.
+
+    Hashes stay valid argon2 strings, so verify() still works across both
+    instances; only the deliberate hashing cost is removed.
+    """
+    hasher = PasswordHasher(time_cost=1, memory_cost=8, parallelism=1)
+    patcher = pytest.MonkeyPatch()
+    for module_name in _PASSWORD_HASHER_MODULES:
+        patcher.setattr(f"{module_name}.password_hasher", hasher)
+    yield hasher
+    patcher.undo()
+
+
+@lru_cache(maxsize=1)
+def _base_app():
+    """One Flask app (blueprints, extensions) for the whole test process."""
+    return create_app(TestConfig)
+
+
+@pytest.fixture
+def app():
+    """The shared app; config changes made by a test are undone afterwards."""
+    app = _base_app()
+    saved_config = dict(app.config)
+    yield app
+    app.config.clear()
+    app.config.update(saved_config)
+
+
+@pytest.fixture
+def db_session(app):
+    """db.session bound to an outer transaction rolled back after each test.
+
+    Commits made by the test (or the code under test) only release a
+    SAVEPOINT, so nothing leaks into the next test. The schema itself comes
+    from create_app() (ensure_runtime_tables).
+    """
+    with app.app_context():
+        engines = db.engines
+        engine = engines[None]
+        connection = engine.connect()
+        driver_connection = connection.connection.driver_connection
+        if engine.dialect.name == "sqlite":
+            # pysqlite's implicit BEGIN does not mix with SAVEPOINT: drive the
+            # transaction explicitly for the duration of the test.
+            driver_connection.isolation_level = None
+        transaction = connection.begin()
+        if engine.dialect.name == "sqlite":
+            connection.exec_driver_sql("BEGIN")
+        engines[None] = connection
+        db.session.remove()
+        db.session.configure(join_transaction_mode="create_savepoint")
+        try:
+            yield db.session
+        finally:
+            db.session.remove()
+            db.session.configure(join_transaction_mode="conservative_savepoint")
+            engines[None] = engine
+            transaction.rollback()
+            if engine.dialect.name == "sqlite":
+                driver_connection.isolation_level = ""
+            connection.close()
+
+
+@pytest.fixture
+def client(app, db_session):
+    """Test client on the shared app; rows written while serving requests
+    (portal settings, ...) are rolled back with the test transaction."""
+    return app.test_client()
+
+
+def _factory(model, **defaults):
+    """Builder for ``model``: keyword arguments override the test defaults.
+
+    Callable defaults are evaluated per object (unique matricules, slugs...).
+    """
+
+    def build(**fields):
+        values = {key: value() if callable(value) else value for key, value in defaults.items()}
+        return model(**{**values, **fields})
+
+    return build
+
+
+_serials = count(90001)
+
+_build_user = _factory(
+    User,
+    username=lambda: f"user_{next(_serials)}",
+    email=lambda: f"user_{next(_serials)}@test.local",
+    password_hash="x",
+    role="FOUNDER",
+    is_active=True,
+    must_change_password=False,
+)
+_build_branch = _factory(Branch, name="Agency", slug=lambda: f"agency-{next(_serials)}", country_code="CI")
+_build_student = _factory(
+    Student,
+    matricule=lambda: f"IF-2026-{next(_serials)}",
+    nom="Test",
+    prenoms="User",
+    sexe="M",
+    filiere="IDA",
+    niveau="L1",
+    promotion="2026",
+)
+_build_subscription = _factory(
+    AgencySubscription,
+    plan_code="starter",
+    status="active",
+    ends_at=lambda: datetime.utcnow() + timedelta(days=60),
+)
+
+
+def _adding_to(db_session, build):
+    def make(**fields):
+        obj = build(**fields)
+        db_session.add(obj)
+        return obj
+
+    return make
+
+
+@pytest.fixture
+def make_user(db_session):
+    return _adding_to(db_session, _build_user)
+
+
+@pytest.fixture
+def make_branch(db_session):
+    return _adding_to(db_session, _build_branch)
+
+
+@pytest.fixture
+def make_student(db_session):
+    return _adding_to(db_session, _build_student)
+
+
+@pytest.fixture
+def make_subscription(db_session):
+    return _adding_to(db_session, _build_subscription)
+
+
+@pytest.fixture
+def two_agencies_with_owners(db_session):
+    """Agencies A and B, each with a FOUNDER owner holding an OWNER membership."""
+    agency_a = Branch(name="Agency A", slug="agency-a", country_code="CI")
+    agency_b = Branch(name="Agency B", slug="agency-b", country_code="CI")
+    user_a = _build_user(username="owner_a", email="a@test.local")
+    user_b = _build_user(username="owner_b", email="b@test.local")
+    # Relationships let the unit of work order the INSERTs: no intermediate flush.
+    # Autoflush stays on for the code under test, only the seeding skips it.
+    with db_session.no_autoflush:
+        db_session.add_all(
+            [
+                agency_a,
+                agency_b,
+                user_a,
+                user_b,
+                Membership(user=user_a, branch=agency_a, role="OWNER"),
+                Membership(user=user_b, branch=agency_b, role="OWNER"),
+            ]
+        )
+        db_session.commit()
+    return SimpleNamespace(agency_a=agency_a, agency_b=agency_b, user_a=user_a, user_b=user_b)
@@ -0,0 +1,68 @@
+import smtplib
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.utils.emailer import SMTPSessionPool
+
+
+_SMTP = SimpleNamespace(
+    id=1,
+    host="smtp.test.local",
+    port=587,
+    use_tls=False,
+    username="agence@test.local",
+    password="secret",
+    from_email="agence@test.local",
+)
+
+
+@pytest.fixture
+def smtp_servers():
+    """Every fake SMTP connection opened by the pool, in order."""
+    servers = []
+
+    def connect(*_args, **_kwargs):
+        servers.append(MagicMock(name=f"smtp_{len(servers)}"))
+        return servers[-1]
+
+    with patch("app.utils.emailer.smtplib.SMTP", side_effect=connect):
+        yield servers
+
+
+def send(pool, to_email="etudiant@test.local"):
+    pool.send(_SMTP, to_email, "Sujet", "<p>Bonjour</p>", "Bonjour")
+
+
+def test_refused_recipient_keeps_the_session(smtp_servers):
+    with SMTPSessionPool() as pool:
+        send(pool)
+        smtp_servers[0].sendmail.side_effect = [smtplib.SMTPRecipientsRefused({}), None]
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            send(pool, "refuse@test.local")
+        send(pool)
+        smtp_servers[0].quit.assert_not_called()
+    assert len(smtp_servers) == 1
+    assert smtp_servers[0].sendmail.call_count == 3
+    smtp_servers[0].quit.assert_called_once()
+
+
+def test_dropped_session_is_closed_and_retried_once(smtp_servers):
+    with SMTPSessionPool() as pool:
+        send(pool)
+        smtp_servers[0].sendmail.side_effect = smtplib.SMTPServerDisconnected("idle")
+        send(pool)
+        smtp_servers[0].quit.assert_called_once()
+        assert len(smtp_servers) == 2
+        smtp_servers[1].sendmail.assert_called_once()
+    smtp_servers[1].quit.assert_called_once()
+
+
+def test_fresh_session_failure_is_not_retried():
+    with patch("app.utils.emailer.smtplib.SMTP") as connect, SMTPSessionPool() as pool:
+        connect.return_value.sendmail.side_effect = ConnectionResetError()
+        with pytest.raises(ConnectionResetError):
+            send(pool)
+        assert connect.call_count == 1
+        connect.return_value.quit.assert_called_once()
@@ -1,43 +1,16 @@
-import unittest
+def test_health_endpoint(client):
+    resp = client.get("/health")
+    assert resp.status_code == 200
+    assert resp.json.get("status") == "ok"
 
-from app import create_app
-from app.extensions import db
 
+def test_auth_login_page_accessible(client):
+    resp = client.get("/auth/login")
+    assert resp.status_code == 200
+    assert b"Se connecter" in resp.data
 
-class SmokeTestCase(unittest.TestCase):
-    def setUp(self):
-        self.app = create_app()
-        self.app.config.update(
-            TESTING=True,
-            WTF_CSRF_ENABLED=False,
-            SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
-            RATELIMIT_ENABLED=False,
-        )
-        self.ctx = self.app.app_context()
-        self.ctx.push()
-        db.create_all()
-        self.client = self.app.test_client()
 
-    def tearDown(self):
-        db.session.remove()
-        db.drop_all()
-        self.ctx.pop()
-
-    def test_health_endpoint(self):
-        resp = self.client.get("/health")
-        self.assertEqual(resp.status_code, 200)
-        self.assertEqual(resp.json.get("status"), "ok")
-
-    def test_auth_login_page_accessible(self):
-        resp = self.client.get("/auth/login")
-        self.assertEqual(resp.status_code, 200)
-        self.assertIn(b"Se connecter", resp.data)
-
-    def test_students_requires_auth(self):
-        resp = self.client.get("/students/", follow_redirects=False)
-        self.assertEqual(resp.status_code, 302)
-        self.assertIn("/auth/login", resp.headers.get("Location", ""))
-
-
-if __name__ == "__main__":
-    unittest.main()
+def test_students_requires_auth(client):
+    resp = client.get("/students/", follow_redirects=False)
+    assert resp.status_code == 302
+    assert "/auth/login" in resp.headers.get("Location", "")
@@ -0,0 +1,64 @@
+import io
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Student
+
+
+_HEADER = "matricule;nom;prenoms;email;filiere;niveau;promotion"
+_KNOWN_MATRICULE = "IF-2026-80001"
+
+
+@pytest.fixture
+def importer(client, db_session, make_student, two_agencies_with_owners):
+    """Client logged in as agency A's founder, with one known student."""
+    agencies = two_agencies_with_owners
+    agencies.user_a.branch_id = agencies.agency_a.id
+    make_student(
+        branch_id=agencies.agency_a.id,
+        matricule=_KNOWN_MATRICULE,
+        nom="Kone",
+        prenoms="Awa",
+        sexe="F",
+        email="a@test.local",
+    )
+    db_session.commit()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(agencies.user_a.id)
+        sess["_fresh"] = True
+    return client
+
+
+def import_rows(client, *rows):
+    content = "\n".join((_HEADER, *rows)).encode()
+    resp = client.post(
+        "/students/import",
+        data={"file": (io.BytesIO(content), "eleves.csv")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 302
+
+
+def emails_by_name(db_session):
+    db_session.expire_all()
+    return {student.nom: student.email for student in db_session.scalars(select(Student))}
+
+
+def test_import_does_not_match_an_email_moved_by_an_earlier_row(importer, db_session):
+    import_rows(
+        importer,
+        f"{_KNOWN_MATRICULE};Kone;Awa;b@test.local;IDA;L1;2026",
+        ";Diallo;Moussa;a@test.local;IDA;L1;2026",
+    )
+    assert emails_by_name(db_session) == {"Kone": "b@test.local", "Diallo": "a@test.local"}
+
+
+def test_import_matches_an_email_set_by_an_earlier_row(importer, db_session):
+    import_rows(
+        importer,
+        f"{_KNOWN_MATRICULE};Kone;Awa;b@test.local;IDA;L1;2026",
+        ";Kone;Awa Marie;b@test.local;IDA;L2;2026",
+    )
+    assert emails_by_name(db_session) == {"Kone": "b@test.local"}
+    assert db_session.execute(select(Student.prenoms, Student.niveau)).one() == ("Awa Marie", "L2")
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import delete
+
+from app.models import AgencySubscription, User
+from app.utils.subscriptions import (
+    _get_subscription_for_user,
+    get_subscription_for_user,
+    invalidate_portal_settings_cache,
+    process_subscription_notifications,
+)
+
+
+def resolved_sub_id(user):
+    """Subscription id for ``user``, checked against the column-only lookup."""
+    sub = get_subscription_for_user(user)
+    row = _get_subscription_for_user(user, columns=(AgencySubscription.id,))
+    assert (row.id if row else None) == (sub.id if sub else None)
+    return sub.id if sub else None
+
+
+@pytest.fixture
+def agencies(two_agencies_with_owners):
+    agencies = two_agencies_with_owners
+    agencies.user_a.branch_id = agencies.agency_a.id
+    agencies.user_b.branch_id = agencies.agency_b.id
+    return agencies
+
+
+@pytest.fixture
+def fresh_portal_settings():
+    """The settings snapshot cache outlives the test transaction: drop it on both sides."""
+    invalidate_portal_settings_cache()
+    yield
+    invalidate_portal_settings_cache()
+
+
+def test_founder_gets_billable_subscription_first(db_session, make_subscription, agencies):
+    # Older non-billable row on B, billable row on the founder's own branch A.
+    older = make_subscription(branch=agencies.agency_b, owner_user=agencies.user_a)
+    billable = make_subscription(branch=agencies.agency_a, owner_user=agencies.user_a)
+    db_session.commit()
+    assert older.id < billable.id
+    assert resolved_sub_id(agencies.user_a) == billable.id
+
+
+def test_founder_falls_back_to_oldest_owned_subscription(db_session, make_branch, make_subscription, agencies):
+    oldest = make_subscription(branch=agencies.agency_b, owner_user=agencies.user_a)
+    make_subscription(branch=make_branch(), owner_user=agencies.user_a)
+    db_session.commit()
+    assert resolved_sub_id(agencies.user_a) == oldest.id
+
+
+def test_founder_without_subscription_uses_branch_subscription(db_session, make_user, make_subscription, agencies):
+    agencies.user_a.branch_id = None
+    branch_sub = make_subscription(branch=agencies.agency_b, owner_user=agencies.user_a)
+    db_session.commit()
+    assert resolved_sub_id(agencies.user_b) == branch_sub.id
+
+    no_branch = make_user()
+    db_session.commit()
+    assert resolved_sub_id(no_branch) is None
+
+
+def test_branch_subscription_resolves_to_owner_billable_one(db_session, make_user, make_subscription, agencies):
+    employee = make_user(role="EMPLOYEE", branch_id=agencies.agency_b.id)
+    branch_sub = make_subscription(branch=agencies.agency_b, owner_user=agencies.user_a)
+    billable = make_subscription(branch=agencies.agency_a, owner_user=agencies.user_a)
+    db_session.commit()
+    assert branch_sub.id < billable.id
+    assert resolved_sub_id(employee) == billable.id
+
+
+def test_branch_subscription_kept_when_owner_is_gone(db_session, make_user, make_subscription, agencies):
+    employee = make_user(role="EMPLOYEE", branch_id=agencies.agency_b.id)
+    branch_sub = make_subscription(branch=agencies.agency_b, owner_user=agencies.user_a)
+    db_session.commit()
+    db_session.execute(delete(User).where(User.id == agencies.user_a.id))
+    db_session.commit()
+    assert resolved_sub_id(employee) == branch_sub.id
+
+
+def test_notification_sweep_transitions_and_resend_guard(
+    app, db_session, make_branch, make_subscription, agencies, fresh_portal_settings
+):
+    now = datetime.utcnow()
+    owner = agencies.user_a
+
+    def make_sub(ends_in, **fields):
+        return make_subscription(branch=make_branch(), owner_user=owner, ends_at=now + ends_in, **fields)
+
+    expiring = make_sub(timedelta(days=3))
+    lapsed = make_sub(timedelta(days=-1))
+    far = make_sub(timedelta(days=30))
+    warned_recently = make_sub(timedelta(days=2), last_warning_sent_at=now - timedelta(hours=1))
+    db_session.commit()
+    ids = {"expiring": expiring.id, "lapsed": lapsed.id, "far": far.id, "warned_recently": warned_recently.id}
+
+    def sweep():
+        # No SMTP configured: no mail goes out, the sweep still records its state.
+        with app.test_request_context("/"):
+            process_subscription_notifications()
+        db_session.expire_all()
+        return {name: db_session.get(AgencySubscription, sub_id) for name, sub_id in ids.items()}
+
+    subs = sweep()
+    assert subs["expiring"].status == "active"
+    assert subs["expiring"].last_warning_sent_at is not None
+    assert subs["lapsed"].status == "expired"
+    assert subs["lapsed"].last_expired_sent_at is not None
+    assert subs["far"].last_warning_sent_at is None
+    assert subs["far"].last_expired_sent_at is None
+    assert subs["warned_recently"].last_warning_sent_at == now - timedelta(hours=1)
+
+    stamps = {name: (sub.last_warning_sent_at, sub.last_expired_sent_at) for name, sub in subs.items()}
+    subs = sweep()
+    assert {name: (sub.last_warning_sent_at, sub.last_expired_sent_at) for name, sub in subs.items()} == stamps
+    assert subs["lapsed"].status == "expired"
+
+
+@pytest.mark.parametrize("base_url,exit_code", [("", 1), ("https://crm.test.local", 0)])
+def test_subscription_job_requires_public_base_url(app, base_url, exit_code):
+    app.config["PUBLIC_BASE_URL"] = base_url
+    with patch("app.process_subscription_notifications") as sweep:
+        result = app.test_cli_runner().invoke(args=["process-subscriptions"])
+    assert result.exit_code == exit_code
+    assert sweep.called is (exit_code == 0)
@@ -1,126 +1,92 @@
-from datetime import datetime
+from unittest.mock import patch
 
-from flask_login import login_user, logout_user
+import pytest
+from sqlalchemy import func, select, update
 
-from app import create_app
 from app.extensions import db
-from app.models import Branch, Membership, Student, User
+from app.models import Student, StudentAuth, StudyCase
+from app.student_portal.routes import SESSION_KEY as STUDENT_SESSION_KEY
 from app.utils.authz import scope_query_by_branch
 
 
-class TestConfig:
-    SECRET_KEY = "test"
-    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    TESTING = True
-    WTF_CSRF_ENABLED = False
-
-
-def _mk_user(username, email):
-    return User(
-        username=username,
-        email=email,
-        password_hash="x",
-        role="FOUNDER",
-        is_active=True,
-        must_change_password=False,
-    )
-
-
-def _mk_student(branch_id, matricule):
-    return Student(
-        branch_id=branch_id,
-        matricule=matricule,
-        nom="Test",
-        prenoms="User",
-        sexe="M",
-        filiere="IDA",
-        niveau="L1",
-        promotion="2026",
-    )
-
-
-def test_isolation_between_agencies():
-    app = create_app(TestConfig)
-    with app.app_context():
-        db.create_all()
-
-        agency_a = Branch(name="Agency A", slug="agency-a", country_code="CI")
-        agency_b = Branch(name="Agency B", slug="agency-b", country_code="CI")
-        db.session.add_all([agency_a, agency_b])
-        db.session.flush()
-
-        user_a = _mk_user("owner_a", "a@test.local")
-        user_b = _mk_user("owner_b", "b@test.local")
-        db.session.add_all([user_a, user_b])
-        db.session.flush()
-
-        db.session.add_all(
-            [
-                Membership(user_id=user_a.id, branch_id=agency_a.id, role="OWNER"),
-                Membership(user_id=user_b.id, branch_id=agency_b.id, role="OWNER"),
-                _mk_student(agency_a.id, "IF-2026-90001"),
-            ]
-        )
-        db.session.commit()
-
-        with app.test_request_context("/"):
-            login_user(user_b)
-            rows_b = scope_query_by_branch(Student.query, Student).all()
-            assert len(rows_b) == 0
-            logout_user()
-
-
-def test_soft_deleted_student_not_visible():
-    app = create_app(TestConfig)
-    with app.app_context():
-        db.create_all()
-
-        agency_a = Branch(name="Agency A", slug="agency-a", country_code="CI")
-        db.session.add(agency_a)
-        db.session.flush()
-
-        user_a = _mk_user("owner_a", "a@test.local")
-        db.session.add(user_a)
-        db.session.flush()
-        db.session.add(Membership(user_id=user_a.id, branch_id=agency_a.id, role="OWNER"))
-
-        student = _mk_student(agency_a.id, "IF-2026-90002")
-        db.session.add(student)
-        db.session.commit()
-
-        student.deleted_at = datetime.utcnow()
-        db.session.commit()
-
-        with app.test_request_context("/"):
-            login_user(user_a)
-            rows = scope_query_by_branch(Student.query, Student).all()
-            assert len(rows) == 0
-            logout_user()
-
-
-def test_new_agency_starts_empty():
-    app = create_app(TestConfig)
-    with app.app_context():
-        db.create_all()
-
-        agency_a = Branch(name="Agency A", slug="agency-a", country_code="CI")
-        agency_b = Branch(name="Agency B", slug="agency-b", country_code="CI")
-        db.session.add_all([agency_a, agency_b])
-        db.session.flush()
-
-        user_a = _mk_user("owner_a", "a@test.local")
-        user_b = _mk_user("owner_b", "b@test.local")
-        db.session.add_all([user_a, user_b])
-        db.session.flush()
-
-        db.session.add(Membership(user_id=user_a.id, branch_id=agency_a.id, role="OWNER"))
-        db.session.add(Membership(user_id=user_b.id, branch_id=agency_b.id, role="OWNER"))
-        db.session.add(_mk_student(agency_a.id, "IF-2026-90003"))
-        db.session.commit()
-
-        with app.test_request_context("/"):
-            login_user(user_b)
-            rows_b = scope_query_by_branch(Student.query, Student).all()
-            assert len(rows_b) == 0
-            logout_user()
+# Built once: every scoped variant reuses SQLAlchemy's compiled-statement cache.
+_STUDENTS = select(Student)
+
+def scoped_students():
+    return db.session.scalars(scope_query_by_branch(_STUDENTS, Student)).all()
+
+
+@pytest.mark.parametrize(
+    "scenario,expected_count",
+    [
+        ("other_tenant", 0),
+        ("soft_deleted", 0),
+        ("empty_new", 0),
+        ("own_agency", 1),
+    ],
+)
+def test_student_visibility_by_agency(app, db_session, make_student, two_agencies_with_owners, scenario, expected_count):
+    agencies = two_agencies_with_owners
+    viewer = agencies.user_b
+    if scenario != "empty_new":
+        student = make_student(branch_id=agencies.agency_a.id)
+        db_session.flush()
+        if scenario == "soft_deleted":
+            db_session.execute(update(Student).where(Student.id == student.id).values(deleted_at=func.now()))
+        db_session.commit()
+        if scenario in ("soft_deleted", "own_agency"):
+            viewer = agencies.user_a
+
+    # Scoping only reads current_user: stub it instead of a full login_user().
+    with app.test_request_context("/"), patch("flask_login.utils._get_user", return_value=viewer):
+        rows = scoped_students()
+    assert len(rows) == expected_count
+
+
+@pytest.fixture
+def archived_student_case(db_session, make_student, two_agencies_with_owners):
+    branch_id = two_agencies_with_owners.agency_a.id
+    student = make_student(branch_id=branch_id)
+    db_session.flush()
+    case_row = StudyCase(student_id=student.id, branch_id=branch_id)
+    db_session.add(case_row)
+    db_session.execute(update(Student).where(Student.id == student.id).values(deleted_at=func.now()))
+    db_session.commit()
+    ids = case_row.id, student.id
+    db_session.expunge_all()
+    return ids
+
+
+def test_archived_student_hidden_from_student_queries(db_session, archived_student_case):
+    _, student_id = archived_student_case
+    assert db_session.scalars(_STUDENTS.where(Student.id == student_id)).first() is None
+    assert Student.query.filter(Student.id == student_id).count() == 0
+    assert Student.query.execution_options(include_deleted=True).filter(Student.id == student_id).count() == 1
+
+
+def test_archived_student_kept_in_case_joins(db_session, archived_student_case):
+    case_id, _ = archived_student_case
+    rows = StudyCase.query.join(Student, StudyCase.student_id == Student.id).filter(StudyCase.id == case_id).all()
+    assert [row.id for row in rows] == [case_id]
+
+
+def test_archived_student_lazy_loads_from_case(db_session, archived_student_case):
+    case_id, student_id = archived_student_case
+    case_row = db_session.get(StudyCase, case_id)
+    assert case_row.student is not None
+    assert case_row.student.id == student_id
+
+
+def test_archived_student_portal_session_is_closed(client, db_session, archived_student_case):
+    _, student_id = archived_student_case
+    db_session.add(StudentAuth(student_id=student_id, password_hash="x", must_change_password=False))
+    db_session.commit()
+    with client.session_transaction() as sess:
+        sess[STUDENT_SESSION_KEY] = db_session.scalars(select(StudentAuth.id)).one()
+
+    resp = client.get("/student/")
+    assert resp.status_code == 302
+    assert "/student/login" in resp.headers["Location"]
+    assert client.get("/student/login").status_code == 200
+    with client.session_transaction() as sess:
+        assert STUDENT_SESSION_KEY not in sess
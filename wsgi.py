@@ -0,0 +1,4 @@
+from app import create_app
+
+# Point d'entree WSGI (gunicorn wsgi:app) et CLI (flask --app wsgi.py ...).
+app = create_app()